@@ -1,4 +1,7 @@
 from .winclass import *
 from .write import mkwin
+from .writer.stream import WINWriter
 from .gen_files import *
-from .reader import *
\ No newline at end of file
+from .reader import *
+from .archive import Archive
+from .aio import aread
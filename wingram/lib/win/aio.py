@@ -0,0 +1,147 @@
+"""
+Module for reading WIN files with asyncio.
+
+On network filesystems the latency of each file dominates,
+so the files are read concurrently in threads
+and each of them is decoded as soon as its bytes arrive.
+"""
+import io
+import asyncio
+import datetime
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from functools import partial
+import pandas as pd
+
+from ...utils.log import logger
+from .winclass import WIN
+from .reader.core import __read1file__, __merge__, __fill_gaps__, __trim__
+
+def __read_bytes__(
+    fp:str,
+) -> bytes:
+    """
+    Read whole bytes of fp. Blocking.
+    """
+    with open(fp, 'rb') as f:
+        return f.read()
+
+async def __aread1file__(
+    fp:str,
+    io_pool:Executor,
+    decode_pool:Executor,
+    chnumber:list[str] = None,
+    starttime:datetime.datetime = None,
+    endtime:datetime.datetime = None,
+    resync:bool = False,
+) -> pd.Series:
+    """
+    Read bytes of 1 file in io_pool and decode them in decode_pool.
+    """
+    loop = asyncio.get_running_loop()
+    raw = await loop.run_in_executor(io_pool, __read_bytes__, fp)
+    logger.debug(f"Loaded {len(raw)} B: {fp}")
+    return await loop.run_in_executor(
+        decode_pool,
+        partial(
+            __read1file__,
+            io.BytesIO(raw),
+            chnumber = chnumber,
+            starttime = starttime,
+            endtime = endtime,
+            resync = resync,
+            ),
+        )
+
+async def aread(
+    fp:str|list[str],
+    ch:list[str] = None,
+    starttime:datetime.datetime = None,
+    endtime:datetime.datetime = None,
+    max_concurrency:int = 16,
+    sort:bool = True,
+    fill_value = None,
+    resync:bool = False,
+) -> WIN:
+    """
+    Read WIN files concurrently with asyncio.
+    At most max_concurrency files are read at the same time 
+    in a thread pool of that size,
+    and each file is decoded in another thread pool once its bytes are loaded.
+    The data are merged in the given order of fp
+    as wingram.read does.
+
+    Example
+    ----------
+    win = await wingram.aread(files, ch=["0200"], max_concurrency=32)
+
+    Parameters
+    ----------
+    fp: str or list[str]
+        File path(s) of WIN data.
+        gzip/bz2/xz-compressed files are decompressed in memory.
+    ch: list[str], optional
+        List of channel number to exclusively read.
+    starttime: datetime.datetime, optional
+        Start time to read data.
+    endtime: datetime.datetime, optional
+        End time to read data.
+    max_concurrency: int, optional, default 16
+        Maximum number of files read at the same time.
+    sort: bool, optional, default True
+        If True, sort the returned data by channel number.
+    fill_value: optional
+        If given, missing seconds of each channel are filled with it.
+    resync: bool, optional, default False
+        If True, broken 1s segments are skipped.
+    """
+    if isinstance(fp, (str, Path)):
+        fp = [fp]
+    if isinstance(ch, str):
+        ch = [ch]
+    if starttime is not None and endtime is not None and starttime >= endtime:
+        raise ValueError(f"Start time is same or later than end time: start {starttime}, end {endtime}")
+    if max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be positive: {max_concurrency}")
+
+    # ----------------------
+    # read and decode
+    # ----------------------
+    with (
+        ThreadPoolExecutor(max_workers=max_concurrency) as io_pool,
+        ThreadPoolExecutor() as decode_pool,
+        ):
+        datalist = await asyncio.gather(*[
+            __aread1file__(
+                f,
+                io_pool,
+                decode_pool,
+                chnumber = ch,
+                starttime = starttime,
+                endtime = endtime,
+                resync = resync,
+                )
+            for f in fp
+        ])
+
+    # ----------------------
+    # merge and trim
+    # ----------------------
+    if len(datalist) == 0:
+        data = pd.Series(dtype=object)
+    elif len(datalist) == 1:
+        data = datalist[0]
+    else:
+        data = __merge__(list(datalist))
+    if fill_value is not None:
+        data = __fill_gaps__(data, fill_value)
+    if starttime is not None or endtime is not None:
+        st = starttime if starttime is not None else datetime.datetime.min
+        et = endtime if endtime is not None else datetime.datetime.max
+        for i in range(len(data)):
+            data.iloc[i] = __trim__(*data.iloc[i], st, et)
+
+    win = WIN()
+    win.__set_rawdata__(data, sort=sort)
+    win.fp = fp
+    return win
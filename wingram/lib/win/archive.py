@@ -0,0 +1,375 @@
+"""
+Catalog of a directory tree of WIN files.
+
+The location and start time of every 1s segment and the channels
+of each file are recorded in a SQLite database,
+so that data of a time range can be read without listing the files.
+"""
+import os
+import sqlite3
+import datetime
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from ...utils.log import logger
+from .winclass import WIN
+from .reader.parser import bit_parser
+from .reader.index import __scan_index__, INDEX_SUFFIX
+from .reader.core import __assemble_units__, __merge__, __fill_gaps__, __trim__
+
+CATALOG_NAME = ".wingram_catalog.sqlite"
+# files which are never WIN data -----------
+IGNORED_SUFFIXES = (INDEX_SUFFIX, ".ch", ".sqlite", ".sqlite-journal")
+
+def __scan_file__(
+    fp:str,
+) -> dict:
+    """
+    Scan headers of 1 file for the catalog.
+    Defined at module level to be sent to worker processes.
+    Return None if it is not a valid WIN file.
+    """
+    try:
+        index = __scan_index__(bit_parser.__open_win__(fp, use_mmap=True))
+    except (OSError, ValueError) as e:
+        logger.debug(f"Not a WIN file: {fp}: {e}")
+        return None
+    return {
+        "time": index["sec_time"].astype(np.int64),
+        "offset": index["sec_offset"],
+        "size": index["sec_size"],
+        "ch": [f"{ch:04X}" for ch in np.unique(index["ch_number"])],
+    }
+
+def __to_epoch__(
+    time:datetime.datetime,
+) -> float:
+    """
+    datetime to seconds from 1970-01-01 (same as datetime64[s] in the catalog).
+    """
+    return (np.datetime64(time, 'us') - np.datetime64(0, 'us')) / np.timedelta64(1, 's')
+
+class Archive:
+    """
+    Catalog of WIN files under a directory, backed by SQLite.
+
+    Example
+    ----------
+    archive = wingram.Archive("/data/win")
+    win = archive.read(
+        datetime.datetime(2023,10,29,11,25,0),
+        datetime.datetime(2023,10,29,11,30,0),
+        ch = ["0200", "0201"],
+        )
+
+    Attributes
+    ----------
+    root: Path
+        Root directory of WIN files.
+    catalog: Path
+        File path of the SQLite catalog.
+    """
+    def __init__(
+        self,
+        root:str,
+        catalog:str = None,
+        update:bool = True,
+        n_jobs:int = None,
+        ):
+        """
+        Parameters
+        ----------
+        root: str
+            Root directory of WIN files. Subdirectories are also searched.
+        catalog: str, optional
+            File path of the catalog. root/.wingram_catalog.sqlite by default.
+        update: bool, optional, default True
+            If True, update the catalog on opening.
+        n_jobs: int, optional
+            Number of worker processes to scan files.
+            The number of CPUs if None.
+        """
+        self.root = Path(root)
+        if catalog is None:
+            catalog = self.root / CATALOG_NAME
+        self.catalog = Path(catalog)
+        self.con = sqlite3.connect(self.catalog)
+        self.con.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE,
+                size INTEGER,
+                mtime_ns INTEGER,
+                starttime INTEGER,
+                endtime INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS segments (
+                file_id INTEGER,
+                time INTEGER,
+                offset INTEGER,
+                size INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS channels (
+                file_id INTEGER,
+                ch TEXT
+            );
+            CREATE INDEX IF NOT EXISTS segments_time ON segments(time);
+            CREATE INDEX IF NOT EXISTS segments_file ON segments(file_id);
+            CREATE INDEX IF NOT EXISTS channels_file ON channels(file_id);
+            """
+        )
+        if update:
+            self.update(n_jobs=n_jobs)
+        return
+
+    def __repr__(self):
+        n_files, st, et = self.con.execute(
+            "SELECT COUNT(*), MIN(starttime), MAX(endtime) FROM files WHERE starttime IS NOT NULL"
+        ).fetchone()
+        txt = f"Archive\t:{self.root} ({n_files} files)\n"
+        if n_files > 0:
+            st = np.datetime64(st, 's').astype(datetime.datetime)
+            et = np.datetime64(et, 's').astype(datetime.datetime)
+            txt += f"time\t:{st} - {et}\n"
+        return txt
+
+    def close(self):
+        self.con.close()
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    # =======================
+    # catalog
+    # =======================
+    def __walk__(self) -> dict:
+        """
+        Return {path: (size, mtime_ns)} of candidate files under root.
+        """
+        out = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(IGNORED_SUFFIXES):
+                    continue
+                fp = os.path.join(dirpath, name)
+                if os.path.abspath(fp) == os.path.abspath(self.catalog):
+                    continue
+                stat = os.stat(fp)
+                out[fp] = (stat.st_size, stat.st_mtime_ns)
+        return out
+
+    def update(
+        self,
+        n_jobs:int = None,
+        ):
+        """
+        Scan new or modified files (judged by size and mtime)
+        and remove deleted ones from the catalog.
+        Only the headers are read.
+
+        Parameters
+        ----------
+        n_jobs: int, optional
+            Number of worker processes to scan files.
+            The number of CPUs if None.
+        """
+        files = self.__walk__()
+        known = {
+            path: (fid, size, mtime_ns)
+            for fid, path, size, mtime_ns
+            in self.con.execute("SELECT id, path, size, mtime_ns FROM files")
+        }
+        # ----------------------
+        # deleted or modified files
+        # ----------------------
+        removed = [
+            known[path][0] for path in known
+            if path not in files or files[path] != known[path][1:]
+        ]
+        for table, key in (("segments", "file_id"), ("channels", "file_id"), ("files", "id")):
+            self.con.executemany(
+                f"DELETE FROM {table} WHERE {key} = ?",
+                [(fid,) for fid in removed],
+            )
+        targets = sorted(
+            path for path in files
+            if path not in known or files[path] != known[path][1:]
+        )
+        logger.info(f"Scanning {len(targets)} files ({len(removed)} removed or modified).")
+
+        # ----------------------
+        # scan headers
+        # ----------------------
+        if n_jobs is None:
+            n_jobs = os.cpu_count()
+        if n_jobs > 1 and len(targets) > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                results = pool.map(__scan_file__, targets, chunksize=64)
+                self.__insert__(targets, results, files)
+        else:
+            self.__insert__(targets, map(__scan_file__, targets), files)
+        self.con.commit()
+        return self
+
+    def __insert__(
+        self,
+        targets:list[str],
+        results,
+        files:dict,
+        ):
+        """
+        Insert scanned results into the catalog.
+        Files which are not WIN data are recorded without time
+        not to scan them again.
+        """
+        for fp, result in zip(targets, results):
+            size, mtime_ns = files[fp]
+            if result is None or len(result["time"]) == 0:
+                self.con.execute(
+                    "INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                    (fp, size, mtime_ns),
+                )
+                continue
+            cur = self.con.execute(
+                "INSERT INTO files (path, size, mtime_ns, starttime, endtime) VALUES (?, ?, ?, ?, ?)",
+                (
+                    fp, size, mtime_ns,
+                    int(result["time"].min()),
+                    int(result["time"].max()) + 1,
+                ),
+            )
+            fid = cur.lastrowid
+            self.con.executemany(
+                "INSERT INTO segments (file_id, time, offset, size) VALUES (?, ?, ?, ?)",
+                zip(
+                    [fid]*len(result["time"]),
+                    result["time"].tolist(),
+                    result["offset"].tolist(),
+                    result["size"].tolist(),
+                    ),
+            )
+            self.con.executemany(
+                "INSERT INTO channels (file_id, ch) VALUES (?, ?)",
+                [(fid, ch) for ch in result["ch"]],
+            )
+        return
+
+    # =======================
+    # read
+    # =======================
+    def files(
+        self,
+        starttime:datetime.datetime = None,
+        endtime:datetime.datetime = None,
+        ch:list[str] = None,
+        ) -> list[str]:
+        """
+        Files overlapping starttime-endtime and containing any of ch.
+        """
+        query = "SELECT path FROM files WHERE starttime IS NOT NULL"
+        params = []
+        if starttime is not None:
+            query += " AND endtime > ?"
+            params.append(__to_epoch__(starttime))
+        if endtime is not None:
+            query += " AND starttime < ?"
+            params.append(__to_epoch__(endtime))
+        if ch is not None:
+            query += f" AND id IN (SELECT file_id FROM channels WHERE ch IN ({','.join('?'*len(ch))}))"
+            params += [c.upper() for c in ch]
+        query += " ORDER BY starttime, path"
+        return [row[0] for row in self.con.execute(query, params)]
+
+    def read(
+        self,
+        starttime:datetime.datetime,
+        endtime:datetime.datetime,
+        ch:list[str] = None,
+        sort:bool = True,
+        fill_value = None,
+        ) -> WIN:
+        """
+        Read data of starttime <= time < endtime.
+        Only the 1s segments recorded in the catalog
+        for the time range are opened and decoded.
+
+        Parameters
+        ----------
+        starttime: datetime.datetime
+            Start time to read data.
+        endtime: datetime.datetime
+            End time to read data.
+        ch: list[str], optional
+            List of channel number to exclusively read.
+        sort: bool, optional, default True
+            If True, sort the returned data by channel number.
+        fill_value: optional
+            If given, missing seconds of each channel are filled with it.
+        """
+        if isinstance(ch, str):
+            ch = [ch]
+        if starttime >= endtime:
+            raise ValueError(f"Start time is same or later than end time: start {starttime}, end {endtime}")
+
+        # ----------------------
+        # find segments
+        # ----------------------
+        query = (
+            "SELECT f.path, s.time, s.offset, s.size FROM segments s "
+            "JOIN files f ON s.file_id = f.id "
+            "WHERE s.time > ? AND s.time < ?"
+        )
+        params = [__to_epoch__(starttime) - 1, __to_epoch__(endtime)]
+        if ch is not None:
+            query += f" AND s.file_id IN (SELECT file_id FROM channels WHERE ch IN ({','.join('?'*len(ch))}))"
+            params += [c.upper() for c in ch]
+        query += " ORDER BY f.starttime, f.path, s.offset"
+        rows = self.con.execute(query, params).fetchall()
+
+        # ----------------------
+        # decode the segments of each file
+        # ----------------------
+        chset = None if ch is None else {c.upper() for c in ch}
+        datalist = []
+        fp = None
+        for path, sectime, offset, size in rows:
+            if path != fp:
+                if fp is not None:
+                    datalist.append(__assemble_units__(units))
+                fp = path
+                buf = bit_parser.__open_win__(fp, use_mmap=True)
+                units = []
+            segment = buf[offset:offset+size]
+            _sectime = np.datetime64(sectime, 's')
+            for chnum, sample_size, fs, loc in bit_parser.__scan_1ch_headers__(segment, chset):
+                units.append((chnum, buf, sample_size, fs, offset + loc, _sectime))
+        if fp is not None:
+            datalist.append(__assemble_units__(units))
+        logger.debug(f"{len(rows)} s segments are read from {len(datalist)} files.")
+
+        # ----------------------
+        # merge and trim
+        # ----------------------
+        if len(datalist) == 0:
+            data = pd.Series(dtype=object)
+        elif len(datalist) == 1:
+            data = datalist[0]
+        else:
+            data = __merge__(datalist)
+        if fill_value is not None:
+            data = __fill_gaps__(data, fill_value)
+        for i in range(len(data)):
+            data.iloc[i] = __trim__(*data.iloc[i], starttime, endtime)
+
+        win = WIN()
+        win.__set_rawdata__(data, sort=sort)
+        win.fp = list(dict.fromkeys(row[0] for row in rows))
+        return win
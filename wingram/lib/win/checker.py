@@ -8,45 +8,53 @@ Classes to check WIN binary data.
 from ...utils.log import logger
 from .reader.parser import bit_parser
 
-def __check_winfile__(fp):
+def __check_winfile__(
+    fp,
+    return_skipped:bool = False,
+):
     """
-    Check header of WIN file.
+    Check headers of WIN file.
+    Broken 1s segments are skipped up to the next valid one.
+
+    Parameters
+    ----------
+    fp: str
+        File path of WIN data.
+    return_skipped: bool, optional, default False
+        If True, also return the skipped byte ranges.
+
+    Returns
+    -------
+    outinfo: list[dict]
+        Location, byte size, start time and channel headers 
+        of each valid 1s segment.
+    skipped: list[tuple[int, int]]
+        (start, end) of each skipped byte range [B].
+        Returned only if return_skipped is True.
     """
-    segments = bit_parser.__split1s__(fp)
+    buf = bit_parser.__open_win__(fp, use_mmap=True)
+    segments, skipped = bit_parser.__scan1s__(buf)
+    logger.info(f"{len(segments)} s segments are found in {fp}.")
+    for start, end in skipped:
+        logger.warning(f"Skipped invalid data: {start}-{end} B")
     
     outinfo = [None]*len(segments)
-    for sec in range(len(segments)):
-        logger.info(f"{sec+1}/{len(segments)}[s]")
-        secinfo = {
-            "bytesize": None,
-            "starttime": None,
-            "ch": None,
+    for sec, (loc, bytesize) in enumerate(segments):
+        segment = buf[loc:loc+bytesize]
+        outinfo[sec] = {
+            "offset": loc,
+            "bytesize": bytesize,
+            "starttime": bit_parser.__get_starttime__(segment),
+            "ch": [
+                {
+                    "chnum": chnum,
+                    "sample_size": sample_size,
+                    "fs": fs,
+                    "n_ch": bit_parser.__1ch_bytesize__(sample_size, fs),
+                }
+                for chnum, sample_size, fs, _ in bit_parser.__scan_1ch_headers__(segment)
+            ],
         }
-        secinfo["bytesize"], secinfo["starttime"] = bit_parser.__read_1s_header__(segments[0])
-        
-        chsegments = bit_parser.__1s_to_ch__(segments[sec])
-        secinfo["ch"] = [None]*len(chsegments)
-        
-        for ch in range(len(chsegments)):
-            logger.info(f"\t{ch+1}/{len(chsegments)}[ch]")
-            secinfo["ch"][ch] = {
-                "chnum": None,
-                "sample_size": None,
-                "fs":None,
-                "n_ch":None
-            }
-            try:
-                (secinfo["ch"][ch]["chnum"],
-                secinfo["ch"][ch]["sample_size"],
-                secinfo["ch"][ch]["fs"],
-                secinfo["ch"][ch]["n_ch"]) = bit_parser.__read_chheader__(chsegments[ch])
-            except:
-                pass
-        outinfo[sec] = secinfo
+    if return_skipped:
+        return outinfo, skipped
     return outinfo
-        
-        
-        
-        
-
-
@@ -1 +1,5 @@
-from .parser import *
\ No newline at end of file
+from .stream import iter_seconds, follow
+from .buffer import decode_into
+# formerly re-exported from .parser -----------
+from .parser import bit_parser
+from ....utils.int_bit import bit2signint
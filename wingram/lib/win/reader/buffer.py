@@ -0,0 +1,219 @@
+"""
+Module for decoding WIN data into preallocated buffers.
+
+Repeated reads of fixed-size windows (e.g. rolling detection)
+can reuse the same (n_ch, n_samples) array
+instead of building WIN and WIN1ch objects every time.
+"""
+import os
+import datetime
+from pathlib import Path
+import numpy as np
+
+from ....utils.log import logger
+from .parser import bit_parser
+from .index import __get_index__, __scan_index__
+
+# headers of files used by decode_into: {(path, resync): ((size, mtime_ns), index)} -----------
+INDEX_CACHE = {}
+INDEX_CACHE_SIZE = 256
+
+def __resync_index__(
+    buf,
+) -> dict:
+    """
+    Index of the valid 1s segments and their channel units,
+    skipping broken segments.
+    """
+    buf = memoryview(buf)
+    offsets, sizes, _ = bit_parser.__scan_1s_headers__(buf, resync=True)
+    parts = [
+        __scan_index__(buf[offset:offset+size])
+        for offset, size in zip(offsets.tolist(), sizes.tolist())
+    ]
+    index = {}
+    for key in ("sec_offset", "sec_size", "sec_time", "ch_number", "ch_offset", "ch_sample_size", "ch_fs"):
+        index[key] = np.concatenate([part[key] for part in parts]) if parts else np.array([])
+    # locations relative to each segment to those in the file -----------
+    n_units = [len(part["ch_number"]) for part in parts]
+    index["sec_offset"] = offsets
+    index["ch_offset"] = index["ch_offset"] + np.repeat(offsets, n_units)
+    index["ch_sec"] = np.repeat(np.arange(len(parts)), n_units)
+    return index
+
+def __cached_index__(
+    fp,
+    buf = None,
+    resync:bool = False,
+) -> dict:
+    """
+    Headers of fp arranged for decode_into.
+    Those of a file path are kept in memory while its size and mtime are unchanged,
+    so repeated windows of the same file do not scan it again.
+    File-like objects are scanned from buf every time.
+    """
+    if hasattr(fp, 'read'):
+        key = None
+    else:
+        stat = os.stat(fp)
+        key = (os.path.abspath(fp), resync)
+        cached = INDEX_CACHE.get(key)
+        if cached is not None and cached[0] == (stat.st_size, stat.st_mtime_ns):
+            return cached[1]
+    
+    if resync:
+        index = __resync_index__(buf if buf is not None else bit_parser.__open_win__(fp, use_mmap=True))
+    elif key is None:
+        index = __scan_index__(buf)
+    else:
+        index = __get_index__(fp, save=False)
+    
+    # ----------------------
+    # arrange for the lookup
+    # ----------------------
+    sec_us = index["sec_time"].astype("datetime64[us]").astype(np.int64)
+    ch_number = index["ch_number"].astype(np.int64)
+    ch_fs = index["ch_fs"].astype(np.int64)
+    min_fs = {}
+    for ch in np.unique(ch_number).tolist():
+        min_fs[ch] = int(ch_fs[ch_number == ch].min())
+    out = {
+        "sec_us": sec_us,
+        "sorted": bool(np.all(sec_us[1:] >= sec_us[:-1])),
+        # units of segment i are ch_start[i]:ch_start[i+1] -----------
+        "ch_start": np.searchsorted(index["ch_sec"], np.arange(len(sec_us)+1)).tolist(),
+        "ch_number": ch_number.tolist(),
+        "ch_fs": ch_fs.tolist(),
+        "ch_sample_size": index["ch_sample_size"].astype(np.int64).tolist(),
+        "ch_offset": index["ch_offset"].astype(np.int64).tolist(),
+        "min_fs": min_fs,
+    }
+    if key is not None:
+        if len(INDEX_CACHE) >= INDEX_CACHE_SIZE:
+            INDEX_CACHE.pop(next(iter(INDEX_CACHE)))
+        INDEX_CACHE[key] = ((stat.st_size, stat.st_mtime_ns), out)
+    return out
+
+def decode_into(
+    fp:str|list[str],
+    out:np.ndarray,
+    ch_index:dict[str, int],
+    t0:datetime.datetime,
+    mask:np.ndarray = None,
+    use_mmap:bool = True,
+    resync:bool = False,
+) -> np.ndarray:
+    """
+    Decode samples of t0 <= time < t0 + n_samples/fs
+    directly into rows of a caller-supplied int32 array.
+
+    Example
+    ----------
+    out = np.empty((2, 60*100), dtype=np.int32)
+    mask = np.empty(out.shape, dtype=bool)
+    ch_index = {"0200": 0, "0201": 1}
+    for t0 in windows:
+        wingram.decode_into(files, out, ch_index, t0, mask=mask)
+        detect(out, mask)
+
+    Parameters
+    ----------
+    fp: str or list[str]
+        File path(s) of WIN data. Only 1s segments overlapping
+        the window are decoded.
+        If the same second of a channel is in several files,
+        the first one is used.
+    out: np.ndarray
+        int32 array of shape (n_ch, n_samples).
+        Samples out of the data are left untouched.
+    ch_index: dict[str, int]
+        Row of out for each channel number.
+        Other channels are skipped.
+    t0: datetime.datetime
+        Time of the first column of out.
+        It should be on the sampling grid of the channels.
+    mask: np.ndarray, optional
+        bool array of the same shape as out to write the validity into.
+        A new array is allocated if None.
+    use_mmap: bool, optional, default True
+        If True, memory-map the files instead of loading whole data.
+    resync: bool, optional, default False
+        If True, broken 1s segments are skipped.
+
+    Returns
+    -------
+    mask: np.ndarray
+        bool array of the same shape as out,
+        True where samples are decoded.
+    """
+    if out.ndim != 2 or out.dtype != np.int32:
+        raise ValueError(f"out must be 2D int32 array: {out.ndim}D {out.dtype}")
+    if mask is None:
+        mask = np.zeros(out.shape, dtype=bool)
+    elif mask.shape != out.shape or mask.dtype != bool:
+        raise ValueError(f"mask must be bool array of shape {out.shape}: {mask.shape} {mask.dtype}")
+    else:
+        mask[:] = False
+    if isinstance(fp, (str, Path)) or hasattr(fp, 'read'):
+        fp = [fp]
+    n_samples = out.shape[1]
+    rows = {int(ch, 16): row for ch, row in ch_index.items()}
+    t0 = np.datetime64(t0, 'us').astype(np.int64)
+
+    for f in fp:
+        # file-like objects can be read only once -----------
+        buf = bit_parser.__open_win__(f, use_mmap=use_mmap) if hasattr(f, 'read') else None
+        index = __cached_index__(f, buf=buf, resync=resync)
+        if len(index["sec_us"]) == 0:
+            continue
+        # ----------------------
+        # segments in the window
+        # (n_samples/fs is the longest at the lowest fs of the channels)
+        # ----------------------
+        min_fs = min(
+            (index["min_fs"][ch] for ch in rows if ch in index["min_fs"]),
+            default = 0,
+        )
+        if min_fs == 0:
+            continue
+        t1 = t0 + int(np.ceil(n_samples / min_fs * 1e6))
+        sec_time = index["sec_us"]
+        if index["sorted"]:
+            i0 = np.searchsorted(sec_time, t0 - 1_000_000, side='right')
+            i1 = np.searchsorted(sec_time, t1, side='left')
+            selected = range(i0, max(i0, i1))
+        else:
+            selected = np.flatnonzero((sec_time > t0 - 1_000_000) & (sec_time < t1))
+        if len(selected) == 0:
+            continue
+        if buf is None:
+            buf = bit_parser.__open_win__(f, use_mmap=use_mmap)
+        
+        # ----------------------
+        # decode channel units
+        # ----------------------
+        ch_start = index["ch_start"]
+        ch_number = index["ch_number"]
+        for i in selected:
+            # microseconds from t0 -----------
+            lag = int(sec_time[i]) - t0
+            for r in range(ch_start[i], ch_start[i+1]):
+                row = rows.get(ch_number[r])
+                if row is None:
+                    continue
+                fs = index["ch_fs"][r]
+                col = round(lag*fs/1e6)
+                # part of the second in the window -----------
+                i0 = max(0, -col)
+                i1 = min(fs, n_samples - col)
+                if i0 >= i1 or mask[row, col+i0]:
+                    continue
+                sample_size = index["ch_sample_size"][r]
+                offset = index["ch_offset"][r]
+                if i0 == 0 and i1 == fs:
+                    bit_parser.__decode_1ch__(buf, sample_size, fs, offset, out=out[row, col:col+fs])
+                else:
+                    out[row, col+i0:col+i1] = bit_parser.__decode_1ch__(buf, sample_size, fs, offset)[i0:i1]
+                mask[row, col+i0:col+i1] = True
+    logger.debug(f"{mask.sum()} / {mask.size} samples are decoded.")
+    return mask
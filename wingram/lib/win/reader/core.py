@@ -3,8 +3,12 @@ Module for reading WIN data (2024/09/14)
 
 """
 #%%
+import io
 import os
+import bisect
 from pathlib import Path
+from functools import partial
+from concurrent.futures import Executor, ProcessPoolExecutor
 import numpy as np
 # import xarray as xr
 import pandas as pd
@@ -12,74 +16,650 @@ import datetime
 from ....utils.log import logger
 from ....utils.timehandler import yy2yyyy
 from .parser import bit_parser
+from .index import __get_index__
 # from bitarray import bitarray
 
     
+# bytes of channel units decoded at once -----------
+DECODE_BATCH_SIZE = 1 << 22
+
 def __get_timerangelist__(
     fps:list[str],
+    use_index:bool = False,
+    resync:bool = False,
 ):
     """
     複数ファイルの開始時刻と終了時刻の配列を取得する．
+    ヘッダのみを読む (bit_parser.__probe__)．
+    resyncの場合は壊れた秒ブロックを飛ばして全ヘッダを検査する．
     """
     st = [None]*len(fps)
     et = [None]*len(fps)
     for i in range(len(fps)):
         logger.debug(f"Getting Time Range {i+1}/{len(fps)}")
         fp = fps[i]
-        segments = bit_parser.__split1s__(fp)
-        st[i] = bit_parser.__get_starttime__(segments[0])
-        et[i] = bit_parser.__get_starttime__(segments[-1]) + datetime.timedelta(seconds=1)
+        # file-like object is read again after probing -----------
+        pos = fp.tell() if hasattr(fp, 'read') else None
+        try:
+            st[i], et[i] = __get_timerange__(fp, use_index=use_index, resync=resync)
+        finally:
+            if pos is not None:
+                fp.seek(pos)
     return st, et
 
+def __get_timerange__(
+    fp,
+    use_index:bool = False,
+    resync:bool = False,
+) -> tuple[datetime.datetime, datetime.datetime]:
+    """
+    1ファイルの開始時刻と終了時刻を取得する．
+    file-likeオブジェクトには索引ファイルを使わない．
+    """
+    if use_index and not hasattr(fp, 'read'):
+        sec_time = __get_index__(fp)["sec_time"]
+    elif resync:
+        sec_time = bit_parser.__scan_1s_headers__(
+            bit_parser.__open_win__(fp, use_mmap=True),
+            resync = True,
+        )[2]
+    else:
+        info = bit_parser.__probe__(fp)
+        return info["starttime"], info["endtime"]
+    return (
+        sec_time.min().astype(datetime.datetime),
+        (sec_time.max() + np.timedelta64(1, 's')).astype(datetime.datetime),
+    )
+
+def __time_axis__(
+    starttime:datetime.datetime,
+    fs:int,
+) -> np.ndarray:
+    """
+    Time axis of 1s segment in datetime64[us].
+    """
+    dt = np.timedelta64(datetime.timedelta(seconds=1/fs))
+    return np.datetime64(starttime, 'us') + np.arange(fs)*dt
+
+def __expand_time__(
+    time:np.ndarray|tuple,
+    n:int,
+) -> np.ndarray:
+    """
+    Time axis of n samples in datetime64[us].
+    time is either the array itself or (starttime, fs) of equally spaced samples,
+    whose i-th sample is at starttime + round(i/fs) ns as in WIN1ch.
+    """
+    if not isinstance(time, tuple):
+        return time
+    starttime, fs = time
+    return (
+        np.datetime64(starttime, 'ns')
+        + np.round(np.arange(n) * (1e9/fs)).astype("timedelta64[ns]")
+    ).astype("datetime64[us]")
+
+def __search_implicit__(
+    starttime:np.datetime64,
+    fs:int,
+    n:int,
+    time:datetime.datetime,
+) -> int:
+    """
+    Position of the first sample at or after time on (starttime, fs) time axis of n samples.
+    """
+    starttime = np.datetime64(starttime, 'ns')
+    # clip not to overflow in ns (e.g. datetime.min) -----------
+    time = min(
+        max(np.datetime64(time, 'us'), starttime.astype("datetime64[us]") - np.timedelta64(1, 's')),
+        starttime.astype("datetime64[us]") + np.timedelta64(int(np.ceil(n/fs)) + 1, 's'),
+    ).astype("datetime64[ns]")
+    found = lambda i: starttime + np.timedelta64(round(i * (1e9/fs)), 'ns') >= time
+    # estimate and correct rounding -----------
+    i = (time - starttime) / np.timedelta64(1, 's') * fs
+    i = int(min(max(np.ceil(i), 0), n))
+    while i > 0 and found(i-1):
+        i -= 1
+    while i < n and not found(i):
+        i += 1
+    return i
+
+def __select_1s__(
+    sec_time:np.ndarray,
+    starttime:datetime.datetime = None,
+    endtime:datetime.datetime = None,
+) -> np.ndarray:
+    """
+    Positions of 1s segments overlapping starttime-endtime.
+    Binary search is used when the segments are in time order.
+    """
+    sec_time = sec_time.astype("datetime64[us]")
+    if np.all(sec_time[1:] >= sec_time[:-1]):
+        i0 = 0
+        i1 = len(sec_time)
+        if starttime is not None:
+            i0 = np.searchsorted(
+                sec_time,
+                np.datetime64(starttime, 'us') - np.timedelta64(1, 's'),
+                side = 'right',
+                )
+        if endtime is not None:
+            i1 = np.searchsorted(sec_time, np.datetime64(endtime, 'us'), side='left')
+        return np.arange(i0, max(i0, i1))
+    # not in time order -----------
+    use_sec = np.ones(len(sec_time), dtype=bool)
+    if starttime is not None:
+        use_sec &= sec_time + np.timedelta64(1, 's') > np.datetime64(starttime, 'us')
+    if endtime is not None:
+        use_sec &= sec_time < np.datetime64(endtime, 'us')
+    return np.nonzero(use_sec)[0]
+
+def __trim__(
+    data:np.ndarray,
+    time:np.ndarray,
+    starttime:datetime.datetime,
+    endtime:datetime.datetime,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Trim (data, time) to starttime <= time < endtime.
+    Sorted time is trimmed by slicing found with binary search.
+    Time of (starttime, fs) is trimmed without making the time axis.
+    """
+    if isinstance(time, tuple):
+        _st, fs = time
+        i0 = __search_implicit__(_st, fs, len(data), starttime)
+        i1 = max(i0, __search_implicit__(_st, fs, len(data), endtime))
+        _st = np.datetime64(_st, 'ns') + np.timedelta64(round(i0 * (1e9/fs)), 'ns')
+        return data[i0:i1], (_st, fs)
+    st = np.datetime64(starttime, 'us')
+    et = np.datetime64(endtime, 'us')
+    if np.all(time[1:] >= time[:-1]):
+        i0 = np.searchsorted(time, st, side='left')
+        i1 = np.searchsorted(time, et, side='left')
+        return data[i0:i1], time[i0:i1]
+    mask = (time >= st) & (time < et)
+    return data[mask], time[mask]
+
+def __seconds2series__(
+    seconds:list[tuple[datetime.datetime, dict]],
+) -> pd.Series:
+    """
+    Concatenate decoded 1s segments into (data, time) of each channel.
+    
+    Parameters
+    ----------
+    seconds: list[tuple[datetime.datetime, dict]]
+        Pairs of start time and {ch: samples} of 1s segments
+        as yielded by iter_seconds.
+    """
+    datalist = {}
+    sectimes = {}
+    for sectime, secdata in seconds:
+        for ch, data in secdata.items():
+            datalist.setdefault(ch, []).append(data)
+            sectimes.setdefault(ch, []).append(sectime)
+    outdata = pd.Series(
+        {
+            ch: (
+                np.concatenate(datalist[ch]),
+                __seconds2time__(sectimes[ch], [len(data) for data in datalist[ch]]),
+            )
+            for ch in datalist
+        },
+        dtype = object,
+    )
+    return outdata
+
+def __seconds2time__(
+    sectimes:list,
+    fslist:list[int],
+):
+    """
+    Time of samples in 1s segments starting at sectimes with fslist samples.
+    (starttime, fs) is returned if the segments are contiguous with the same fs,
+    otherwise the time axis in datetime64[us].
+    """
+    sectimes = np.array(sectimes, dtype="datetime64[us]")
+    if len(set(fslist)) == 1:
+        fs = fslist[0]
+        if np.all(np.diff(sectimes) == np.timedelta64(1, 's')):
+            return (sectimes[0].astype("datetime64[ns]"), fs)
+        # all seconds at once -----------
+        return (sectimes[:, None] + np.arange(fs)*np.timedelta64(datetime.timedelta(seconds=1/fs))).ravel()
+    return np.concatenate([
+        __time_axis__(sectime, fs) for sectime, fs in zip(sectimes, fslist)
+    ])
+
+def __assemble_units__(
+    units:list[tuple],
+) -> pd.Series:
+    """
+    Decode channel units into one preallocated (data, time) per channel.
+    time is (starttime, fs) if the seconds of the channel are contiguous
+    with the same fs, otherwise the time axis in datetime64[us].
+    
+    Parameters
+    ----------
+    units: list[tuple]
+        (chnum, buf, sample_size, fs, offset, sectime) of each channel unit
+        as found by the header scan, where offset is the location of 
+        the channel header in buf. Units sharing buf, sample size and fs 
+        are decoded together.
+        Units are sorted by sectime, and only the first unit is used
+        if the same second of a channel appears more than once.
+    """
+    # =======================
+    # sort and drop duplicated seconds
+    # =======================
+    units = sorted(units, key=lambda unit: unit[5])
+    seen = set()
+    _units = []
+    for unit in units:
+        key = (unit[0], unit[5])
+        if key not in seen:
+            seen.add(key)
+            _units.append(unit)
+    if len(_units) < len(units):
+        logger.debug(f"{len(units)-len(_units)} duplicated channel units are dropped.")
+    units = _units
+    
+    # =======================
+    # allocate
+    # =======================
+    npts = {}
+    for chnum, _, _, fs, _, _ in units:
+        npts[chnum] = npts.get(chnum, 0) + fs
+    datalist = {ch: np.empty(n, dtype=np.int32) for ch, n in npts.items()}
+    timelist = {}
+    
+    # =======================
+    # location of each unit in its channel
+    # =======================
+    loc = dict.fromkeys(npts, 0)
+    pos = [0]*len(units)
+    groups = {}
+    chunits = {ch: [] for ch in npts}
+    for j, (chnum, buf, sample_size, fs, _, _) in enumerate(units):
+        pos[j] = loc[chnum]
+        loc[chnum] += fs
+        groups.setdefault((id(buf), sample_size, fs), []).append(j)
+        chunits[chnum].append(j)
+    
+    # =======================
+    # decode units of the same buffer, sample size and fs at once
+    # =======================
+    for (_, sample_size, fs), idx in groups.items():
+        buf = units[idx[0]][1]
+        n_batch = max(1, DECODE_BATCH_SIZE // bit_parser.__1ch_bytesize__(sample_size, fs))
+        for k in range(0, len(idx), n_batch):
+            batch = idx[k:k+n_batch]
+            decoded = bit_parser.__decode_batch__(
+                buf,
+                sample_size,
+                fs,
+                [units[j][4] for j in batch],
+                )
+            for j, row in zip(batch, decoded):
+                datalist[units[j][0]][pos[j]:pos[j]+fs] = row
+    
+    # =======================
+    # time axis
+    # =======================
+    # (starttime, fs) for contiguous seconds of the same fs -----------
+    for chnum, idx in chunits.items():
+        timelist[chnum] = __seconds2time__(
+            [units[j][5] for j in idx],
+            [units[j][3] for j in idx],
+        )
+    
+    outdata = pd.Series(
+        {ch: (datalist[ch], timelist[ch]) for ch in npts},
+        dtype = object,
+    )
+    return outdata
+
+def __read1file_index__(
+    fp:str,
+    chnumber:list[str] = None,
+    use_mmap:bool = True,
+    starttime:datetime.datetime = None,
+    endtime:datetime.datetime = None,
+) -> pd.Series:
+    """
+    Read 1 file using its index.
+    Only channel units of the requested channels and time range are decoded.
+    """
+    index = __get_index__(fp)
+    buf = bit_parser.__open_win__(fp, use_mmap=use_mmap)
+    
+    # =======================
+    # select channel units
+    # =======================
+    sec_time = index["sec_time"]
+    use_sec = np.zeros(len(sec_time), dtype=bool)
+    use_sec[__select_1s__(sec_time, starttime, endtime)] = True
+    
+    use_ch = use_sec[index["ch_sec"]]
+    if chnumber is not None:
+        use_ch &= np.isin(
+            index["ch_number"],
+            [int(ch, 16) for ch in chnumber],
+            )
+    rows = np.nonzero(use_ch)[0]
+    
+    # =======================
+    # decode
+    # =======================
+    units = [
+        (
+            f"{index['ch_number'][r]:04X}",
+            buf,
+            int(index["ch_sample_size"][r]),
+            int(index["ch_fs"][r]),
+            int(index["ch_offset"][r]),
+            sec_time[index["ch_sec"][r]],
+        )
+        for r in rows
+    ]
+    outdata = __assemble_units__(units)
+    
+    # extract channel -----------
+    # (channels may be missing when no segment is in the time range)
+    if chnumber is not None:
+        outdata = outdata[outdata.index.isin([ch.upper() for ch in chnumber])]
+    return outdata
+
 def __read1file__(
     fp:str,
     chnumber:list[str] = None,
+    use_mmap:bool = True,
+    use_index:bool = False,
+    starttime:datetime.datetime = None,
+    endtime:datetime.datetime = None,
+    resync:bool = False,
 ) -> pd.Series:
     """
     Read 1 file and return data.
+    Each row holds a tuple of (data, time) of the channel.
+    Only 1s segments overlapping starttime-endtime are decoded.
+    If use_index is True, the sidecar index is used to find them
+    (except for file-like object, which has no path for the index).
+    If resync is True, broken 1s segments are skipped.
     """
+    if use_index and not hasattr(fp, 'read'):
+        return __read1file_index__(
+            fp,
+            chnumber = chnumber,
+            use_mmap = use_mmap,
+            starttime = starttime,
+            endtime = endtime,
+            )
     # =======================
     # oepn and split into each 1s segments
     # =======================
-    segments = bit_parser.__split1s__(fp)
+    buf = bit_parser.__open_win__(fp, use_mmap=use_mmap)
+    # hop headers and search the segments in the time range -----------
+    offsets, sizes, sec_time = bit_parser.__scan_1s_headers__(buf, resync=resync)
+    if starttime is not None or endtime is not None:
+        selected = __select_1s__(sec_time, starttime, endtime)
+    else:
+        selected = range(len(offsets))
     # =======================
-    # convert into 1ch data
+    # scan channel headers
     # =======================
-    # chlist = [None]*len(segments)
-    # datalist = [None]*len(segments)
-    datasr = [None]*len(segments)
-    for i in range(len(segments)):
-        ch, data = bit_parser.__split_1s_to_1ch__(
-            segments[i],
-            # chnumber = chnumber,
-            )
-        # chlist[i] = ch
-        # datalist[i] = data
+    if chnumber is not None:
+        chset = {ch.upper() for ch in chnumber}
+    else:
+        chset = None
+    offsets = offsets.tolist()
+    sizes = sizes.tolist()
+    sec_time = sec_time.tolist()
+    units = []
+    for i in selected:
+        segment = buf[offsets[i]:offsets[i]+sizes[i]]
+        for chnum, sample_size, fs, offset in bit_parser.__scan_1ch_headers__(segment, chset):
+            units.append((chnum, buf, sample_size, fs, offsets[i] + offset, sec_time[i]))
+    
+    # =======================
+    # decode into 1ch data
+    # =======================
+    outdata = __assemble_units__(units)
+
+    # extract channel -----------
+    # (channels may be missing when no segment is in the time range)
+    if chnumber is not None:
+        outdata = outdata[outdata.index.isin([ch.upper() for ch in chnumber])]
+    return outdata
+
+def __merge__(
+    datalist:list[pd.Series],
+) -> pd.Series:
+    """
+    Merge (data, time) of each channel read from several files 
+    keyed on the 1s segment that each sample belongs to.
+    
+    Samples are sorted by their second,
+    and a second found in more than one file is taken 
+    from the earliest file in datalist as a whole.
+    """
+    chs = list(dict.fromkeys(ch for sr in datalist for ch in sr.index))
+    outdata = {}
+    for ch in chs:
+        parts = [sr[ch] for sr in datalist if ch in sr.index]
+        parts = [part for part in parts if len(part[0]) > 0] or parts[:1]
+        
+        # contiguous parts of (starttime, fs) in order -----------
+        implicit = __merge_implicit__(parts)
+        if implicit is not None:
+            outdata[ch] = implicit
+            continue
+        
+        data = np.concatenate([part[0] for part in parts])
+        time = np.concatenate([__expand_time__(part[1], len(part[0])) for part in parts])
+        src = np.repeat(np.arange(len(parts)), [len(part[0]) for part in parts])
+        
+        # sort by second keeping order of files -----------
+        sec = time.astype("datetime64[s]")
+        order = np.argsort(sec, kind='stable')
+        sec = sec[order]
+        src = src[order]
+        
+        # use the first file of each second -----------
+        _, first, counts = np.unique(sec, return_index=True, return_counts=True)
+        keep = order[src == np.repeat(src[first], counts)]
+        if len(keep) < len(data):
+            logger.debug(f"{ch}: {len(data)-len(keep)} overlapping samples are dropped.")
+        outdata[ch] = (data[keep], time[keep])
+    return pd.Series(outdata, dtype=object)
+
+def __merge_implicit__(
+    parts:list[tuple],
+) -> tuple|None:
+    """
+    Concatenate (data, (starttime, fs)) of parts
+    if each part starts right after the previous one with the same fs.
+    Return None otherwise.
+    """
+    if not all(isinstance(part[1], tuple) for part in parts):
+        return None
+    starttime, fs = parts[0][1]
+    n = 0
+    for data, (_st, _fs) in parts:
+        if _fs != fs or _st != starttime + np.timedelta64(round(n * (1e9/fs)), 'ns'):
+            return None
+        n += len(data)
+    return np.concatenate([part[0] for part in parts]), (starttime, fs)
+
+def __fill_gaps__(
+    outdata:pd.Series,
+    fill_value,
+) -> pd.Series:
+    """
+    Fill missing seconds between the first and last second of each channel 
+    with fill_value so that the time axis becomes continuous.
+    Data is upcast if fill_value does not fit its dtype (e.g. np.nan).
+    """
+    for i in range(len(outdata)):
+        data, time = outdata.iloc[i]
+        if len(data) == 0 or isinstance(time, tuple):
+            # (starttime, fs) has no gap -----------
+            continue
+        sec = time.astype("datetime64[s]")
+        usec, first, counts = np.unique(sec, return_index=True, return_counts=True)
+        fs = counts.max()
+        n_sec = int((usec[-1] - usec[0]) / np.timedelta64(1, 's')) + 1
+        if n_sec == len(usec):
+            continue
+        if np.any(counts != fs):
+            logger.warning(
+                f"{outdata.index[i]}: Gaps are not filled "
+                f"because sampling frequency is not constant."
+                )
+            continue
+        logger.info(f"{outdata.index[i]}: {n_sec-len(usec)} s of gaps are filled with {fill_value}.")
         
-        datasr[i] = pd.Series(
-            data,
-            index = ch,
+        # location of each sample in the continuous axis -----------
+        pos = (
+            np.repeat((usec - usec[0]) / np.timedelta64(1, 's'), counts).astype(np.int64)*fs
+            + np.arange(len(sec)) - np.repeat(first, counts)
+        )
+        _data = np.full(
+            n_sec*fs, 
+            fill_value, 
+            dtype = np.result_type(data.dtype, np.min_scalar_type(fill_value)),
+            )
+        _data[pos] = data
+        _time = (
+            usec[0].astype("datetime64[us]")
+            + np.repeat(np.arange(n_sec)*np.timedelta64(1, 's'), fs)
+            + np.tile(np.arange(fs)*np.timedelta64(datetime.timedelta(seconds=1/fs)), n_sec)
+        )
+        outdata.iloc[i] = (_data, _time)
+    return outdata
+
+def __read1job__(
+    job:tuple,
+    chnumber:list[str] = None,
+    use_mmap:bool = True,
+    use_index:bool = False,
+    resync:bool = False,
+) -> pd.Series:
+    """
+    Read (fp, starttime, endtime) of a job.
+    Defined at module level to be sent to worker processes.
+    """
+    fp, starttime, endtime = job
+    return __read1file__(
+        fp,
+        chnumber = chnumber,
+        use_mmap = use_mmap,
+        use_index = use_index,
+        starttime = starttime,
+        endtime = endtime,
+        resync = resync,
         )
+
+def __split_jobs__(
+    fp:str,
+    n_jobs:int,
+    use_mmap:bool = True,
+    starttime:datetime.datetime = None,
+    endtime:datetime.datetime = None,
+    resync:bool = False,
+) -> list[tuple]:
+    """
+    Split 1 file into jobs of contiguous block ranges.
+    Each job is (fp, starttime, endtime) on the boundary of 1s segments.
+    """
+    sec_time = bit_parser.__scan_1s_headers__(
+        bit_parser.__open_win__(fp, use_mmap=use_mmap),
+        resync = resync,
+    )[2]
+    sec_time = sec_time[__select_1s__(sec_time, starttime, endtime)]
+    if len(sec_time) < 2 or np.any(sec_time[1:] < sec_time[:-1]):
+        # cannot be split by time -----------
+        return [(fp, starttime, endtime)]
     
-    # concat all 1s sections -----------
-    outdata = pd.concat(datasr, axis=1,ignore_index=True)
+    # at least 1 segment for each job -----------
+    n_jobs = min(n_jobs, len(sec_time))
+    bounds = [
+        sec_time[i].astype(datetime.datetime)
+        for i in np.linspace(0, len(sec_time), n_jobs+1, dtype=int)[1:-1]
+    ]
+    bounds = sorted(b for b in set(bounds) if b > sec_time[0].astype(datetime.datetime))
+    sts = [starttime] + bounds
+    ets = bounds + [endtime]
+    return [(fp, st, et) for st, et in zip(sts, ets)]
+
+def __readfiles__(
+    fp:list[str],
+    chnumber:list[str] = None,
+    use_mmap:bool = True,
+    use_index:bool = False,
+    starttime:datetime.datetime = None,
+    endtime:datetime.datetime = None,
+    n_jobs:int = None,
+    executor:Executor = None,
+    fill_value = None,
+    resync:bool = False,
+) -> pd.Series:
+    """
+    Read whole data in the files and merge them.
     
-    # extract channel -----------
-    if chnumber is not None:
-        outdata = outdata.loc[chnumber]
-    
-    outdata = outdata.apply(lambda row: np.hstack(row.values), axis=1)
-    
-    # bit1ch_list = []
-    # for i in range(len(segments)):
-    #     logger.debug(f"Reading {i+1}/{len(segments)}")
-    #     bit1ch = bit_parser.__split_1s_to_1ch__(
-    #         segments[i],
-    #         chnumber = chnumber,
-    #         )
-    #     bit1ch_list.append(bit1ch)
-    # return segments
-    # return chlist, datalist
+    If n_jobs or executor is given, the files are decoded 
+    in worker processes and merged in the given order.
+    A single file is split into block ranges instead.
+    File-like objects cannot be sent to worker processes,
+    so they are read serially.
+    If fill_value is given, gaps are filled with it.
+    """
+    # =======================
+    # make jobs
+    # =======================
+    if n_jobs is not None and n_jobs < 0:
+        n_jobs = os.cpu_count()
+    parallel = executor is not None or (n_jobs is not None and n_jobs > 1)
+    if parallel and any(hasattr(f, 'read') for f in fp):
+        logger.debug("File-like objects are read serially.")
+        parallel = False
+    if parallel and len(fp) == 1 and not use_index:
+        jobs = __split_jobs__(
+            fp[0],
+            n_jobs if n_jobs is not None else os.cpu_count(),
+            use_mmap = use_mmap,
+            starttime = starttime,
+            endtime = endtime,
+            resync = resync,
+            )
+    else:
+        jobs = [(f, starttime, endtime) for f in fp]
+    read1job = partial(
+        __read1job__,
+        chnumber = chnumber,
+        use_mmap = use_mmap,
+        use_index = use_index,
+        resync = resync,
+        )
+    
+    # =======================
+    # read
+    # =======================
+    if not parallel or len(jobs) == 1:
+        datadf_list = [read1job(job) for job in jobs]
+    elif executor is not None:
+        datadf_list = list(executor.map(read1job, jobs))
+    else:
+        logger.debug(f"Reading {len(jobs)} jobs with {n_jobs} processes.")
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(jobs))) as pool:
+            datadf_list = list(pool.map(read1job, jobs))
+    
+    if len(datadf_list) == 1:
+        outdata = datadf_list[0]
+    else:
+        # merge loaded files -----------
+        outdata = __merge__(datadf_list)
+    
+    if fill_value is not None:
+        outdata = __fill_gaps__(outdata, fill_value)
     return outdata
 
 def __readwin__(
@@ -89,6 +669,12 @@ def __readwin__(
     beforesec:float = None,
     aftersec:float = None,
     filenameformat:str = None,
+    use_mmap:bool = True,
+    use_index:bool = False,
+    n_jobs:int = None,
+    executor:Executor = None,
+    fill_value = None,
+    resync:bool = False,
 ) -> pd.Series:
     """
     Load WIN file(s).
@@ -96,7 +682,7 @@ def __readwin__(
     # =======================
     # CHECK
     # =======================
-    if isinstance(fp, (str, Path)):
+    if isinstance(fp, (str, Path)) or hasattr(fp, 'read'):
         fp = [fp]
     logger.debug(f"Given {len(fp)} files.")
     # =======================
@@ -107,32 +693,16 @@ def __readwin__(
         # read whole data in fp 
         # ----------------------
         logger.debug(f"Loading...")
-        
-        if len(fp) == 1:
-            datadf = __read1file__(
-                fp[0],
-                chnumber = chnumber,
-                )
-            return datadf
-        else:
-            # load each file -----------
-            datadf_list = []
-            for i in range(len(fp)):
-                datadf = __read1file__(
-                    fp[i],
-                    chnumber = chnumber,
-                    )
-                datadf_list.append(datadf)
-            
-            # concat loaded files -----------
-            _tmpdf = pd.concat(datadf_list, axis=1)
-            # outdata = _tmpdf.apply(lambda row: np.hstack(row.values), axis=1)
-            outdata = _tmpdf.apply(
-                lambda row: np.hstack(pd.Series(row.values).T.drop_duplicates().values.T),
-                axis=1
-                )
-            
-            return outdata
+        return __readfiles__(
+            fp,
+            chnumber = chnumber,
+            use_mmap = use_mmap,
+            use_index = use_index,
+            n_jobs = n_jobs,
+            executor = executor,
+            fill_value = fill_value,
+            resync = resync,
+            )
     else:
         # ----------------------
         # extract data based on target time
@@ -157,80 +727,80 @@ def __readwin__(
             raise ValueError(f"Start time is same or later than end time: start {tarstarttime}, end {tarendtime}")
         
         # ......................
-        # get start/end time list
+        # get start/end time of each file
         # ......................
+        # non-seekable stream is read once to be probed and read again -----------
+        fp = [
+            io.BytesIO(f.read()) if hasattr(f, 'read') and not (hasattr(f, 'seekable') and f.seekable()) else f
+            for f in fp
+        ]
         if filenameformat is not None:
             logger.debug("Using filenameformat to get time range.")
-            # faster method -----------
-            stlist = [None]*len(fp)
-            etlist = [None]*len(fp)
-            for i in range(len(fp)):
-                f = fp[i]
-                _st = datetime.datetime.strptime(
-                    os.path.basename(f),
-                    filenameformat,
-                    )
-                stlist[i] = _st
-            etlist[:-1] = stlist[1:]
-            
-            # last end time -----------
-            lastseg = bit_parser.__split1s__(fp[-1])[-1]
-            etlist[-1] = bit_parser.__get_starttime__(lastseg) + datetime.timedelta(seconds=1)
-                
+            stlist = [
+                datetime.datetime.strptime(os.path.basename(f), filenameformat)
+                for f in fp
+            ]
         else:
-            logger.debug("Opening all data to get time range of the data")
-            # ----------------------
-            # get time range of each file
-            # ----------------------
-            stlist, etlist = __get_timerangelist__(fp)
+            # read only headers -----------
+            stlist, etlist = __get_timerangelist__(fp, use_index=use_index, resync=resync)
+        
+        # sort files by start time -----------
+        order = sorted(range(len(fp)), key=lambda i: stlist[i])
+        fp = [fp[i] for i in order]
+        stlist = [stlist[i] for i in order]
+        if filenameformat is not None:
+            # each file ends at the start of the next file -----------
+            etlist = stlist[1:] + __get_timerangelist__(fp[-1:], use_index=use_index, resync=resync)[1]
+        else:
+            etlist = [etlist[i] for i in order]
             
         # ----------------------
         # check given target time
         # ----------------------
-        if tarstarttime < min(stlist):
+        if tarstarttime < stlist[0]:
             logger.warning(
-                f"{tarstarttime} < {min(stlist)}\n"
+                f"{tarstarttime} < {stlist[0]}\n"
                 f"Requested start time is earlier than the start time of the given files. "
                 f"Start time is set to the that of the first file."
                 )
-            startidx = 0
-        else:
-            for i in range(len(fp)):
-                if stlist[i] <= tarstarttime and tarstarttime < etlist[i]:
-                    startidx = i
-                    break
-            
-        
         if tarendtime > max(etlist):
             logger.warning(
                 f"Requested end time is later than the end time of the given files."
                 f"End time is set to the that of the last file."
                 )
-            endidx = len(fp) - 1
-        else:
-            for i in range(len(fp)):
-                if stlist[i] <= tarendtime and tarendtime <= etlist[i]:
-                    endidx = i
-                    break
-            logger.debug(f"fp: {fp[startidx:endidx+1]}")
+        
+        # files overlapping the time range -----------
+        # (files starting at or after tarendtime are excluded by binary search,
+        # but the rest may be long and overlap the range)
+        n_candidates = bisect.bisect_left(stlist, tarendtime)
+        targets = [
+            fp[i] for i in range(n_candidates)
+            if etlist[i] > tarstarttime
+        ]
+        logger.debug(f"fp: {targets}")
+        if len(targets) == 0:
+            logger.warning(f"No file overlaps {tarstarttime} - {tarendtime}.")
+            return pd.Series(dtype=object)
             
         # ......................
         # read data
         # ......................
-        outdata = __readwin__(
-            fp[startidx:endidx+1],
+        outdata = __readfiles__(
+            targets,
             chnumber = chnumber,
+            use_mmap = use_mmap,
+            use_index = use_index,
+            starttime = tarstarttime,
+            endtime = tarendtime,
+            n_jobs = n_jobs,
+            executor = executor,
+            fill_value = fill_value,
+            resync = resync,
             )
         # trim data -----------
-        
         for i in range(len(outdata)):
-            outdata.iloc[i] = outdata.iloc[i][:,
-                (outdata.iloc[i][1,:] >= tarstarttime) & (outdata.iloc[i][1,:] < tarendtime)
-            ]
-        # outdata = outdata.apply(
-        #     lambda row:  row[:, (row[1:] >= tarstarttime) & (row[1:] < tarendtime)],
-        # # axis=1
-        # )
+            data, time = outdata.iloc[i]
+            outdata.iloc[i] = __trim__(data, time, tarstarttime, tarendtime)
         
         return outdata
 
@@ -0,0 +1,145 @@
+"""
+Module for the index of WIN file.
+
+The index holds the location of every 1s segment and channel unit
+in the WIN file, so that the required part of the data can be
+read without walking all the headers.
+It is saved as a sidecar file (<fp>.idx) and reused
+while the size and mtime of the WIN file are unchanged.
+"""
+import os
+import numpy as np
+
+from ....utils.log import logger
+from .parser import bit_parser
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+
+def __scan_index__(
+    buf,
+) -> dict:
+    """
+    Walk headers of 1s segments and channel units and make the index.
+    Sample values are not decoded.
+
+    Returns
+    -------
+    index: dict[str, np.ndarray]
+        sec_offset: location of each 1s segment [B].
+        sec_size: byte size of each 1s segment [B].
+        sec_time: start time of each 1s segment.
+        ch_sec: position of the 1s segment containing each channel unit.
+        ch_number: channel number of each channel unit.
+        ch_offset: location of each channel unit in the file [B].
+        ch_sample_size: sample size of each channel unit.
+        ch_fs: sampling frequency of each channel unit.
+    """
+    sec_offset = []
+    sec_size = []
+    sec_time = []
+    ch_sec = []
+    ch_number = []
+    ch_offset = []
+    ch_sample_size = []
+    ch_fs = []
+
+    loc = 0
+    for i, segment in enumerate(bit_parser.__iter1s__(buf)):
+        sec_offset.append(loc)
+        sec_size.append(len(segment))
+        sec_time.append(bit_parser.__get_starttime__(segment))
+
+        chloc = bit_parser.SEC_HEADER_SIZE
+        while chloc + bit_parser.CH_HEADER_SIZE <= len(segment):
+            chnum, sample_size, fs, n_1ch = bit_parser.__read_chheader__(segment, chloc)
+            ch_sec.append(i)
+            ch_number.append(int(chnum, 16))
+            ch_offset.append(loc + chloc)
+            ch_sample_size.append(sample_size)
+            ch_fs.append(fs)
+            chloc += n_1ch
+        loc += len(segment)
+
+    index = {
+        "sec_offset": np.array(sec_offset, dtype=np.int64),
+        "sec_size": np.array(sec_size, dtype=np.int64),
+        "sec_time": np.array(sec_time, dtype="datetime64[s]"),
+        "ch_sec": np.array(ch_sec, dtype=np.int32),
+        "ch_number": np.array(ch_number, dtype=np.uint16),
+        "ch_offset": np.array(ch_offset, dtype=np.int64),
+        "ch_sample_size": np.array(ch_sample_size, dtype=np.uint8),
+        "ch_fs": np.array(ch_fs, dtype=np.uint16),
+    }
+    return index
+
+def __load_index__(
+    fp:str,
+) -> dict:
+    """
+    Load the sidecar index of fp.
+    Return None if it does not exist or is outdated.
+    """
+    idxfp = f"{fp}{INDEX_SUFFIX}"
+    if not os.path.exists(idxfp):
+        return None
+
+    stat = os.stat(fp)
+    try:
+        with np.load(idxfp) as npz:
+            index = {key: npz[key] for key in npz.files}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Failed to load index {idxfp}: {e}")
+        return None
+
+    if (
+        index.get("version") != INDEX_VERSION
+        or index.get("filesize") != stat.st_size
+        or index.get("mtime_ns") != stat.st_mtime_ns
+        ):
+        logger.debug(f"Index is outdated: {idxfp}")
+        return None
+    return index
+
+def __save_index__(
+    fp:str,
+    index:dict,
+) -> None:
+    """
+    Save the index as sidecar file of fp.
+    """
+    idxfp = f"{fp}{INDEX_SUFFIX}"
+    stat = os.stat(fp)
+    try:
+        # give file object to prevent numpy from adding .npz
+        with open(idxfp, "wb") as f:
+            np.savez(
+                f,
+                version = INDEX_VERSION,
+                filesize = stat.st_size,
+                mtime_ns = stat.st_mtime_ns,
+                **index,
+            )
+        logger.debug(f"Saved index: {idxfp}")
+    except OSError as e:
+        logger.warning(f"Failed to save index {idxfp}: {e}")
+    return
+
+def __get_index__(
+    fp:str,
+    save:bool = True,
+) -> dict:
+    """
+    Return the index of fp.
+    The sidecar index is used if it is up to date,
+    otherwise the index is made from the file (and saved if save is True).
+    """
+    index = __load_index__(fp)
+    if index is None:
+        logger.debug(f"Making index: {fp}")
+        index = __scan_index__(
+            bit_parser.__open_win__(fp, use_mmap=True),
+        )
+        if save:
+            __save_index__(fp, index)
+    return index
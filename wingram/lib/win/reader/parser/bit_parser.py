@@ -1,401 +1,775 @@
 """
 Modules for parsing WIN data (2024/09/14).
+
+Every function works on the raw bytes of the WIN data
+(bytes, bytearray or memoryview).
+Files are memory-mapped and passed around as zero-copy memoryview slices.
+Sample values of each channel block are decoded at once with numpy.
+gzip/bz2/xz-compressed files and file-like objects are also accepted.
 """
+import os
+import mmap
+from contextlib import nullcontext
+import gzip
+import bz2
+import lzma
 import numpy as np
-# import xarray as xr
 import datetime
-import pandas as pd
-from bitarray import bitarray
 
 from .....utils.log import logger
 from .....utils.timehandler import yy2yyyy
-from .....utils.int_bit import bit2signint
+
+# =======================
+# constants
+# =======================
+# 1s header: size 4B + start time 6B
+SEC_HEADER_SIZE = 10
+# channel header: ch 2B + sample size 0.5B + fs 1.5B
+CH_HEADER_SIZE = 4
+# magic number of compressed file, opener -----------
+COMPRESSIONS = (
+    (b"\x1f\x8b", gzip.open),
+    (b"BZh", bz2.open),
+    (b"\xfd7zXZ\x00", lzma.open),
+)
+# bytes searched at once for the next valid 1s header
+RESYNC_CHUNK_SIZE = 1 << 20
+
+def __bcd_lut__(vmin:int, vmax:int) -> np.ndarray:
+    """
+    Lookup table of bytes which are BCD of vmin-vmax.
+    """
+    lut = np.zeros(256, dtype=bool)
+    for v in range(vmin, vmax+1):
+        lut[((v // 10) << 4) | (v % 10)] = True
+    return lut
+
+# valid BCD of each byte in the start time (offset in 1s header, table) -----------
+BCD_LUTS = (
+    (5, __bcd_lut__(1, 12)), # month: the most selective
+    (6, __bcd_lut__(1, 31)), # day
+    (7, __bcd_lut__(0, 23)), # hour
+    (8, __bcd_lut__(0, 59)), # minute
+    (9, __bcd_lut__(0, 59)), # second
+    (4, __bcd_lut__(0, 99)), # year
+)
+
+def __bcd2int__(byte:int) -> int:
+    """
+    Convert 1 byte of BCD into integer.
+    """
+    return (byte >> 4)*10 + (byte & 0x0F)
+
 def __get_starttime__(
-    bitarray1s:bitarray,
-):  
-    bitloc = 0
+    buf1s,
+):
+    """
+    Get start time of 1s segment.
+
+    Parameters
+    ----------
+    buf1s: bytes-like
+        Bytes of 1s segment starting from its header.
+    """
     # start time 6B -----------
-    yy = (
-        int(bitarray1s[bitloc+3*8 : bitloc+3*8+4].to01(),2)*10
-        +
-        int(bitarray1s[bitloc+3*8+4 : bitloc+4*8].to01(),2)
-    )
-    mm = (
-        int(bitarray1s[bitloc+4*8 : bitloc+4*8+4].to01(),2)*10
-        +
-        int(bitarray1s[bitloc+4*8+4 : bitloc+5*8].to01(),2)
-    )
-    dd = (
-        int(bitarray1s[bitloc+5*8 : bitloc+5*8+4].to01(),2)*10
-        +
-        int(bitarray1s[bitloc+5*8+4 : bitloc+6*8].to01(),2)
-    )
-    HH = (
-        int(bitarray1s[bitloc+6*8 : bitloc+6*8+4].to01(),2)*10
-        +
-        int(bitarray1s[bitloc+6*8+4 : bitloc+7*8].to01(),2)
-    )
-    MM = (
-        int(bitarray1s[bitloc+7*8 : bitloc+7*8+4].to01(),2)*10
-        +
-        int(bitarray1s[bitloc+7*8+4 : bitloc+8*8].to01(),2)
-    )
-    SS = (
-        int(bitarray1s[bitloc+8*8 : bitloc+8*8+4].to01(),2)*10
-        +
-        int(bitarray1s[bitloc+8*8+4 : bitloc+9*8].to01(),2)
-    )
-    
+    yy, mm, dd, HH, MM, SS = [
+        __bcd2int__(b) for b in bytes(buf1s[4:SEC_HEADER_SIZE])
+    ]
+
     # yy to yyyy ----------------------
     yyyy = yy2yyyy(yy)
-        
+
     startdatetime = datetime.datetime(yyyy,mm,dd,HH,MM,SS)
     logger.debug(f"time {yy}/{mm}/{dd}-{HH}:{MM}:{SS}")
     return startdatetime
 
 def __read_1s_header__(
-    bit1s: bitarray,
+    buf1s,
 ):
-    bitloc = 0
+    """
+    Get byte size and start time of 1s segment.
+    """
     # 1s data length [4B] -----------
-    bytesize = int(bit1s[bitloc:bitloc+3*8].to01(),2)
-        
+    bytesize = int.from_bytes(buf1s[0:4], 'big')
     logger.debug(f"1s size {bytesize} B")
+
+    # start time 6B -----------
+    startdatetime = __get_starttime__(buf1s)
+    return bytesize, startdatetime
+
+def __get_opener__(
+    fp,
+):
+    """
+    Return opener of compressed fp (gzip.open, bz2.open or lzma.open)
+    judged by its magic number, or None if it is not compressed.
+    File-like object is checked only if it is seekable.
+    """
+    if hasattr(fp, 'read'):
+        if not (hasattr(fp, 'seekable') and fp.seekable()):
+            return None
+        pos = fp.tell()
+        magic = fp.read(6)
+        fp.seek(pos)
+    else:
+        with open(fp, 'rb') as f:
+            magic = f.read(6)
+    for _magic, opener in COMPRESSIONS:
+        if magic.startswith(_magic):
+            return opener
+    return None
+
+def __open_stream__(
+    fp,
+):
+    """
+    Open WIN file as a binary stream.
+    Compressed data is decompressed on the fly.
+    Given file-like object is not closed by closing the stream.
+    """
+    opener = __get_opener__(fp)
+    if opener is not None:
+        return opener(fp, 'rb')
+    if hasattr(fp, 'read'):
+        # not to close the given object -----------
+        return nullcontext(fp)
+    return open(fp, 'rb')
+
+def __open_win__(
+    fp,
+    use_mmap:bool = True,
+) -> memoryview:
+    """
+    Open WIN file as a read-only buffer.
+    
+    If use_mmap is True, the file is memory-mapped and
+    slices of the returned memoryview do not copy the data.
+    The mapping is released when all the slices are deleted.
+    Compressed file (gzip/bz2/xz) and file-like object 
+    are read into memory instead.
+    
+    Parameters
+    ----------
+    fp: str or file-like
+        File path of WIN data, or binary file-like object
+        read from its current position.
+    use_mmap: bool
+        If True, memory-map the file instead of reading whole data.
+    """
+    if hasattr(fp, 'read') or __get_opener__(fp) is not None:
+        with __open_stream__(fp) as f:
+            return memoryview(f.read())
+    with open(fp, 'rb') as f:
+        if use_mmap:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty file cannot be mapped
+                return memoryview(b'')
+            return memoryview(mm)
+        else:
+            return memoryview(f.read())
+
+def __check_1s__(
+    buf,
+    loc:int = 0,
+) -> int:
+    """
+    Validate 1s segment starting at loc.
+    Its size, BCD start time and the lengths of channel units are checked.
     
+    Returns
+    -------
+    bytesize: int
+        Byte size of the segment, or 0 if it is invalid.
+    """
+    end = len(buf)
+    if loc + SEC_HEADER_SIZE > end:
+        return 0
+    # 1s data length [4B] -----------
+    bytesize = int.from_bytes(buf[loc:loc+4], 'big')
+    if bytesize < SEC_HEADER_SIZE or loc + bytesize > end:
+        return 0
     # start time 6B -----------
-    yy = (
-        int(bit1s[bitloc+3*8 : bitloc+3*8+4].to01(),2)*10
-        +
-        int(bit1s[bitloc+3*8+4 : bitloc+4*8].to01(),2)
-    )
-    mm = (
-        int(bit1s[bitloc+4*8 : bitloc+4*8+4].to01(),2)*10
-        +
-        int(bit1s[bitloc+4*8+4 : bitloc+5*8].to01(),2)
-    )
-    dd = (
-        int(bit1s[bitloc+5*8 : bitloc+5*8+4].to01(),2)*10
-        +
-        int(bit1s[bitloc+5*8+4 : bitloc+6*8].to01(),2)
-    )
-    HH = (
-        int(bit1s[bitloc+6*8 : bitloc+6*8+4].to01(),2)*10
-        +
-        int(bit1s[bitloc+6*8+4 : bitloc+7*8].to01(),2)
-    )
-    MM = (
-        int(bit1s[bitloc+7*8 : bitloc+7*8+4].to01(),2)*10
-        +
-        int(bit1s[bitloc+7*8+4 : bitloc+8*8].to01(),2)
-    )
-    SS = (
-        int(bit1s[bitloc+8*8 : bitloc+8*8+4].to01(),2)*10
-        +
-        int(bit1s[bitloc+8*8+4 : bitloc+9*8].to01(),2)
-    )
-    logger.debug(f"time {yy}/{mm}/{dd}-{HH}:{MM}:{SS}")
-    # yy to yyyy ----------------------
-    yyyy = yy2yyyy(yy)
+    if any((b >> 4) > 9 or (b & 0x0F) > 9 for b in bytes(buf[loc+4:loc+SEC_HEADER_SIZE])):
+        return 0
+    try:
+        __get_starttime__(buf[loc:loc+SEC_HEADER_SIZE])
+    except ValueError:
+        return 0
+    # channel units fill the segment exactly -----------
+    end = loc + bytesize
+    chloc = loc + SEC_HEADER_SIZE
+    while chloc < end:
+        if chloc + CH_HEADER_SIZE > end:
+            return 0
+        sample_size = buf[chloc+2] >> 4
+        fs = ((buf[chloc+2] & 0x0F) << 8) | buf[chloc+3]
+        if sample_size > 5 or fs == 0:
+            return 0
+        chloc += __1ch_bytesize__(sample_size, fs)
+    if chloc != end:
+        return 0
+    return bytesize
+
+def __find_1s__(
+    buf,
+    loc:int,
+) -> int:
+    """
+    Search forward from loc+1 for the next valid 1s segment.
+    Candidates are found with numpy by their size and BCD start time,
+    and then validated by __check_1s__.
+    
+    Returns
+    -------
+    loc: int
+        Location of the next valid segment, or len(buf) if not found.
+    """
+    arr = np.frombuffer(buf, dtype=np.uint8)
+    start = loc + 1
+    while start + SEC_HEADER_SIZE <= len(arr):
+        stop = min(start + RESYNC_CHUNK_SIZE, len(arr) - SEC_HEADER_SIZE + 1)
+        n = stop - start
+        window = arr[start:stop + SEC_HEADER_SIZE - 1]
+        # BCD start time, narrowing candidates -----------
+        k, lut = BCD_LUTS[0]
+        candidates = np.nonzero(lut[window[k:k+n]])[0]
+        for k, lut in BCD_LUTS[1:]:
+            candidates = candidates[lut[window[candidates + k]]]
+        # size -----------
+        bytesize = np.zeros(len(candidates), dtype=np.int64)
+        for k in range(4):
+            bytesize = (bytesize << 8) | window[candidates + k]
+        candidates = candidates[
+            (bytesize >= SEC_HEADER_SIZE) 
+            & (bytesize <= len(arr) - start - candidates)
+        ]
         
-    startdatetime = datetime.datetime(yyyy,mm,dd,HH,MM,SS)
-    logger.debug(f"time {yy}/{mm}/{dd}-{HH}:{MM}:{SS}")
-    return bytesize, startdatetime
+        for candidate in candidates:
+            if __check_1s__(buf, start + candidate):
+                return start + int(candidate)
+        start = stop
+    return len(arr)
+
+def __iter1s__(
+    buf,
+    resync:bool = False,
+):
+    """
+    Yield each 1s segment in buf as a zero-copy slice.
+    
+    If resync is True, invalid segments are skipped 
+    up to the next valid 1s header instead of raising an error.
+    """
+    buf = memoryview(buf)
+    loc = 0
+    while loc < len(buf):
+        if resync:
+            bytesize = __check_1s__(buf, loc)
+            if bytesize == 0:
+                nextloc = __find_1s__(buf, loc)
+                logger.warning(f"Skipped invalid data: {loc}-{nextloc} B")
+                loc = nextloc
+                continue
+        else:
+            # 1s data length [4B] -----------
+            bytesize = int.from_bytes(buf[loc:loc+4], 'big')
+            if bytesize < SEC_HEADER_SIZE or loc + bytesize > len(buf):
+                raise ValueError(f"Invalid size of 1s segment at {loc} B: {bytesize} B")
+        yield buf[loc:loc+bytesize]
+        loc += bytesize
+
+def __read_exact__(
+    f,
+    size:int,
+) -> bytes:
+    """
+    Read size bytes from stream f unless it reaches the end.
+    """
+    out = f.read(size)
+    while 0 < len(out) < size:
+        _out = f.read(size - len(out))
+        if len(_out) == 0:
+            break
+        out += _out
+    return out
+
+def __iter1s_stream__(
+    f,
+):
+    """
+    Yield each 1s segment read from binary stream f one by one.
+    Only one segment is held in memory at once.
+    """
+    loc = 0
+    while True:
+        # 1s data length [4B] -----------
+        head = __read_exact__(f, 4)
+        if len(head) == 0:
+            return
+        bytesize = int.from_bytes(head, 'big')
+        if len(head) < 4 or bytesize < SEC_HEADER_SIZE:
+            raise ValueError(f"Invalid size of 1s segment at {loc} B: {bytesize} B")
+        body = __read_exact__(f, bytesize - 4)
+        if len(body) < bytesize - 4:
+            raise ValueError(f"1s segment at {loc} B is truncated: {4+len(body)} < {bytesize} B")
+        yield memoryview(head + body)
+        loc += bytesize
+
+def __iter1s_file__(
+    fp,
+    use_mmap:bool = True,
+    resync:bool = False,
+):
+    """
+    Yield each 1s segment of WIN file.
+    Compressed file and file-like object are decompressed and split
+    as the data comes out of the stream, without reading it whole.
+    """
+    if resync or not (hasattr(fp, 'read') or __get_opener__(fp) is not None):
+        yield from __iter1s__(__open_win__(fp, use_mmap=use_mmap), resync=resync)
+        return
+    with __open_stream__(fp) as f:
+        yield from __iter1s_stream__(f)
+
+def __scan1s__(
+    buf,
+) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+    """
+    Validate every 1s segment in buf and resynchronize at broken ones.
+    
+    Returns
+    -------
+    segments: list[tuple[int, int]]
+        (location, byte size) of each valid 1s segment [B].
+    skipped: list[tuple[int, int]]
+        (start, end) of each skipped byte range [B].
+    """
+    buf = memoryview(buf)
+    segments = []
+    skipped = []
+    loc = 0
+    while loc < len(buf):
+        bytesize = __check_1s__(buf, loc)
+        if bytesize == 0:
+            nextloc = __find_1s__(buf, loc)
+            skipped.append((loc, nextloc))
+            loc = nextloc
+            continue
+        segments.append((loc, bytesize))
+        loc += bytesize
+    return segments, skipped
 
 def __split1s__(
     fp:str,
     return_starttime:bool = False,
+    use_mmap:bool = True,
 ):
     """
     Open WIN file and split into each 1s segment.
+    Each segment is a memoryview of the opened file.
     """
     # =======================
-    # read
+    # open
     # =======================
-    with open(fp, 'rb') as f:
-        raw = f.read()
-    bitdata = bitarray(
-        raw,
-        endian='big',
-        )
+    buf = __open_win__(fp, use_mmap=use_mmap)
     
     # =======================
-    # split bitdata into each 1 sec segment
+    # split data into each 1 sec segment
     # =======================
-    bitloc = 0
-    bit_segments = []
-    starttimes = []
-    while bitloc < len(bitdata):
-        logger.debug(f"{bitloc}/{len(bitdata)}")
-        # 1s data length [4B] [Actually 3B?]-----------
-        bytesize = int(bitdata[bitloc:bitloc+3*8].to01(),2)
-        
-        segment = bitdata[bitloc:bitloc+bytesize*8]
-        bit_segments.append(segment)
-        
-        # logger.debug(f"1s size {bytesize} B")
-        
-        if return_starttime:
-            starttimes.append(__get_starttime__(segment))
-        bitloc += bytesize*8
-    
-    logger.debug(f"{len(bit_segments)} s segments are found.")
-    
+    segments = list(__iter1s__(buf))
+    logger.debug(f"{len(segments)} s segments are found.")
+
     if return_starttime:
-        return bit_segments, starttimes
+        starttimes = [__get_starttime__(seg) for seg in segments]
+        return segments, starttimes
     else:
-        return bit_segments
+        return segments
 
-def __read_1chbit__(
-    bit1ch:bitarray,
-    starttime:datetime.datetime = None,
-):
+def __scan_1s_headers__(
+    buf,
+    resync:bool = False,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Convert 1s 1 channel unit bit data to numpy array.
+    Hop through headers of 1s segments without decoding channels.
+    If resync is True, invalid segments are skipped.
+
+    Returns
+    -------
+    offsets: np.ndarray
+        Location of each 1s segment [B].
+    sizes: np.ndarray
+        Byte size of each 1s segment [B].
+    starttimes: np.ndarray
+        Start time of each 1s segment in datetime64[s].
+    """
+    buf = memoryview(buf)
+    if resync:
+        segments = __scan1s__(buf)[0]
+    else:
+        segments = []
+        loc = 0
+        for segment in __iter1s__(buf):
+            segments.append((loc, len(segment)))
+            loc += len(segment)
+    starttimes = [
+        __get_starttime__(buf[loc:loc+SEC_HEADER_SIZE]) for loc, _ in segments
+    ]
+    return (
+        np.array([loc for loc, _ in segments], dtype=np.int64),
+        np.array([size for _, size in segments], dtype=np.int64),
+        np.array(starttimes, dtype="datetime64[s]"),
+    )
+
+def __probe__(
+    fp,
+) -> dict:
+    """
+    Probe time range of WIN file reading only headers.
+    The file is not read whole but the 4B size fields are followed
+    by seeking from 1s header to 1s header.
+    Compressed file and file-like object are streamed instead.
+
+    Returns
+    -------
+    info: dict
+        starttime: start time of the first 1s segment.
+        endtime: end time of the last 1s segment (its start time + 1 s).
+        n_blocks: number of 1s segments.
+    """
+    if hasattr(fp, 'read') or __get_opener__(fp) is not None:
+        n_blocks = 0
+        first = last = None
+        for segment in __iter1s_file__(fp):
+            if first is None:
+                first = bytes(segment[:SEC_HEADER_SIZE])
+            last = segment
+            n_blocks += 1
+        if first is None:
+            raise ValueError(f"No 1s segment is found in {fp}")
+        last = bytes(last[:SEC_HEADER_SIZE])
+    else:
+        with open(fp, 'rb') as f:
+            filesize = os.fstat(f.fileno()).st_size
+            # ----------------------
+            # hop 1s headers
+            # ----------------------
+            loc = 0
+            lastloc = None
+            n_blocks = 0
+            while loc < filesize:
+                f.seek(loc)
+                bytesize = int.from_bytes(__read_exact__(f, 4), 'big')
+                if bytesize < SEC_HEADER_SIZE or loc + bytesize > filesize:
+                    raise ValueError(f"Invalid size of 1s segment at {loc} B in {fp}: {bytesize} B")
+                lastloc = loc
+                loc += bytesize
+                n_blocks += 1
+            if lastloc is None:
+                raise ValueError(f"No 1s segment is found in {fp}")
+            # ----------------------
+            # headers of first and last segments
+            # ----------------------
+            f.seek(0)
+            first = __read_exact__(f, SEC_HEADER_SIZE)
+            f.seek(lastloc)
+            last = __read_exact__(f, SEC_HEADER_SIZE)
     
+    return {
+        "starttime": __get_starttime__(first),
+        "endtime": __get_starttime__(last) + datetime.timedelta(seconds=1),
+        "n_blocks": n_blocks,
+    }
+
+def __1ch_bytesize__(
+    sample_size:int,
+    fs:int,
+):
+    """
+    Byte size of 1s 1 channel unit including its header.
+    """
+    # header 4B + data[0]4B + data[1:] ---------
+    if sample_size == 0:
+        # 0.5B samples are padded to byte boundary
+        return CH_HEADER_SIZE + 4 + fs//2
+    elif sample_size in (1, 2, 3, 4):
+        return CH_HEADER_SIZE + 4 + sample_size*(fs-1)
+    elif sample_size == 5:
+        return CH_HEADER_SIZE + 4*fs
+    else:
+        raise ValueError(f"Unexpected sample size: {sample_size}.")
+
+def __read_chheader__(
+    buf,
+    offset:int = 0,
+    ):
+    """
+    Get channel header.
+    (created 2024/09/21)
+
+    Returns
+    -------
+    chnum: str
+        Channel number in 4-digit upper case hexadecimal.
+    sample_size: int
+        Sample size in WIN format.
+    fs: int
+        Sampling frequency [Hz].
+    n_1ch: int
+        Byte size of the channel unit including the header.
+    """
+    # channel number 2B -----------
+    chnum = format((buf[offset] << 8) | buf[offset+1], '04X')
+    # sample size [Byte] 0.5B -----------
+    sample_size = buf[offset+2] >> 4
+    # sampling rate 1.5B -----------
+    fs = ((buf[offset+2] & 0x0F) << 8) | buf[offset+3]
+
+    n_1ch = __1ch_bytesize__(sample_size, fs)
+    return chnum, sample_size, fs, n_1ch
+
+def __decode_1ch__(
+    buf,
+    sample_size:int,
+    fs:int,
+    offset:int = 0,
+    out:np.ndarray = None,
+) -> np.ndarray:
+    """
+    Decode samples of 1s 1 channel unit into int32 array.
+
     Parameters
     ----------
-    bit1ch: bitarray
-        1s 1 channel unit bit data.
+    buf: bytes-like
+        Bytes containing the channel unit.
+    sample_size: int
+        Sample size in the channel header.
+    fs: int
+        Sampling frequency in the channel header.
+    offset: int
+        Location of the channel header in buf [B].
+    out: np.ndarray, optional
+        int32 array of length fs to decode into.
+        If None, a new array is allocated.
     """
-    bitloc = 0
+    loc = offset + CH_HEADER_SIZE
+    if out is None:
+        out = np.empty(fs, dtype=np.int32)
+    if fs == 0:
+        return out
+
     # ----------------------
-    # Header 4B
+    # amplitude [Supported by WIN version >= 3]
     # ----------------------
-    # # channel number 2B -----------
-    # chnum = int(bit1ch[bitloc : bitloc+2*8].to01(),2)
-    # chnum = format(chnum,'04x')
-    # logger.debug(f"chnum: {chnum}")
+    if sample_size == 5:
+        out[:] = np.frombuffer(buf, dtype='>i4', count=fs, offset=loc)
+        return out
 
-    # sample size [Byte] 0.5B -----------
-    sample_size = int(bit1ch[bitloc+2*8 : bitloc+2*8+4].to01(),2)
+    # ----------------------
+    # first sample 4B + differences
+    # ----------------------
+    out[0] = np.frombuffer(buf, dtype='>i4', count=1, offset=loc)[0]
+    loc += 4
+    n = fs - 1
     if sample_size == 0:
-        bitstep = 4
-    elif sample_size == 1 or sample_size == 2 or sample_size == 3 or sample_size == 4:
-        bitstep = sample_size*8
-    elif sample_size == 5:
-        bitstep = 4*8
+        packed = np.frombuffer(buf, dtype=np.int8, count=(n+1)//2, offset=loc)
+        # arithmetic shift extends sign of 4 bit -----------
+        nibble = np.empty(2*len(packed), dtype=np.int8)
+        nibble[0::2] = packed >> 4
+        nibble[1::2] = (packed << 4) >> 4
+        out[1:] = nibble[:n]
+    elif sample_size == 1:
+        out[1:] = np.frombuffer(buf, dtype=np.int8, count=n, offset=loc)
+    elif sample_size == 2:
+        out[1:] = np.frombuffer(buf, dtype='>i2', count=n, offset=loc)
+    elif sample_size == 3:
+        raw = np.frombuffer(buf, dtype=np.uint8, count=3*n, offset=loc).reshape(n, 3).astype(np.int32)
+        # sign extension of 24 bit -----------
+        out[1:] = (((raw[:,0] << 16) | (raw[:,1] << 8) | raw[:,2]) ^ 0x800000) - 0x800000
+    elif sample_size == 4:
+        out[1:] = np.frombuffer(buf, dtype='>i4', count=n, offset=loc)
     else:
         raise ValueError(f"Unexpected sample size: {sample_size}.")
-    logger.debug(f"sample_size: {sample_size}")
-    logger.debug(f"bitstep: {bitstep}")
-    # sampling rate 1.5B -----------
-    fs =  int(bit1ch[bitloc+2*8+4 : bitloc+4*8].to01(),2)
-    logger.debug(f"fs: {fs}Hz")
-    
-    # header 4B + data[0]4B + data[1:] ---------
-    n_1ch = 4*8 + 4*8 + bitstep*(fs-1)
+
+    # difference to absolute -----------
+    np.cumsum(out, dtype=np.int32, out=out)
+    return out
+
+def __scan_1ch_headers__(
+    buf1s,
+    chnumber:set[str] = None,
+) -> list[tuple]:
+    """
+    Walk channel headers in 1s segment without decoding samples.
+
+    Parameters
+    ----------
+    buf1s: bytes-like
+        Bytes of 1s segment starting from its header.
+    chnumber: set[str], optional
+        Upper case channel numbers to return.
+        Channel units of other channels are skipped.
+
+    Returns
+    -------
+    units: list[tuple]
+        (chnum, sample_size, fs, offset) of each channel unit,
+        where offset is the location of the channel header in buf1s [B].
+    """
+    # loc start after 1sec header
+    loc = SEC_HEADER_SIZE
+    units = []
+    while loc + CH_HEADER_SIZE <= len(buf1s):
+        chnum, sample_size, fs, n_1ch = __read_chheader__(buf1s, loc)
+        if loc + n_1ch > len(buf1s):
+            raise ValueError(
+                f"Channel {chnum} exceeds the 1s segment: {loc+n_1ch} > {len(buf1s)} B"
+                )
+        if chnumber is None or chnum in chnumber:
+            units.append((chnum, sample_size, fs, loc))
+        loc += n_1ch
+    return units
+
+def __decode_batch__(
+    buf,
+    sample_size:int,
+    fs:int,
+    offsets,
+) -> np.ndarray:
+    """
+    Decode channel units of the same sample size and fs at once.
+
+    Parameters
+    ----------
+    buf: bytes-like
+        Bytes containing the channel units.
+    sample_size: int
+        Sample size of the channel units.
+    fs: int
+        Sampling frequency of the channel units.
+    offsets: array-like
+        Locations of the channel headers in buf [B].
+
+    Returns
+    -------
+    out: np.ndarray
+        int32 array of shape (len(offsets), fs).
+    """
+    arr = np.frombuffer(buf, dtype=np.uint8)
+    offsets = np.asarray(offsets, dtype=np.int64) + CH_HEADER_SIZE
+    n = len(offsets)
+    out = np.empty((n, fs), dtype=np.int32)
+    if n == 0 or fs == 0:
+        return out
     
+    def gather(start:int, nbytes:int) -> np.ndarray:
+        # (n, nbytes) bytes from each unit -----------
+        return np.concatenate(
+            [arr[o:o+nbytes] for o in (offsets + start).tolist()]
+        ).reshape(n, nbytes)
+
     # ----------------------
-    # data
+    # amplitude [Supported by WIN version >= 3]
     # ----------------------
-    bitloc += 4*8
-    data = np.zeros((2,fs),dtype=object)*np.nan
-    
-    # first sample 4B -----------
-    data[0,0] = bit2signint(bit1ch[bitloc:bitloc+4*8].to01())
-    
-    bitloc += 4*8
-    # rest data -----------
-    for i in range(1,fs):
-        data[0,i] = bit2signint(bit1ch[bitloc:bitloc+bitstep].to01(),bitstep)
-        bitloc += bitstep
+    if sample_size == 5:
+        out[:] = gather(0, 4*fs).view('>i4')
+        return out
+
+    # ----------------------
+    # first sample 4B + differences
+    # ----------------------
+    out[:, 0] = gather(0, 4).view('>i4')[:, 0]
+    m = fs - 1
+    if sample_size == 0:
+        packed = gather(4, (m+1)//2).view(np.int8)
+        # arithmetic shift extends sign of 4 bit -----------
+        nibble = np.empty((n, 2*packed.shape[1]), dtype=np.int8)
+        nibble[:, 0::2] = packed >> 4
+        nibble[:, 1::2] = (packed << 4) >> 4
+        out[:, 1:] = nibble[:, :m]
+    elif sample_size == 1:
+        out[:, 1:] = gather(4, m).view(np.int8)
+    elif sample_size == 2:
+        out[:, 1:] = gather(4, 2*m).view('>i2')
+    elif sample_size == 3:
+        raw = gather(4, 3*m).reshape(n, m, 3)
+        # sign extension of 24 bit to big endian 32 bit -----------
+        word = np.empty((n, m, 4), dtype=np.uint8)
+        word[:, :, 0] = raw[:, :, 0].view(np.int8) >> 7
+        word[:, :, 1:] = raw
+        out[:, 1:] = word.view('>i4')[:, :, 0]
+    elif sample_size == 4:
+        out[:, 1:] = gather(4, 4*m).view('>i4')
+    else:
+        raise ValueError(f"Unexpected sample size: {sample_size}.")
+
     # difference to absolute -----------
-    if sample_size != 5:
-        data[0] = np.cumsum(data[0])
-    
-    # time axis -----------
-    if starttime is not None:
-        endtime = starttime + datetime.timedelta(seconds=1)
-        dt = datetime.timedelta(seconds=1/fs)
-        time = np.arange(
-            starttime,
-            endtime,
-            dt,
-        )
-        data[1] = time
-        # logger.info(f"time {time.shape}")
-        # logger.info(f"data {data.shape}")
-        # xrdata = xr.DataArray(
-        #     data,
-        #     coords = {
-        #         'time':time,
-        #         },
-        #     dims = [
-        #         'time',
-        #         ],
-        #     )
-    return data
+    np.cumsum(out, axis=1, dtype=np.int32, out=out)
+    return out
 
 def __split_1s_to_1ch__(
-    bit1s:bitarray,
-    # chnumber:list[str] = None,
+    buf1s,
+    chnumber:list[str] = None,
 ):
     """
-    
-    
+    Split 1s segment into channels and decode them.
+
+    Parameters
+    ----------
+    buf1s: bytes-like
+        Bytes of 1s segment starting from its header.
+    chnumber: list[str], optional
+        Channel numbers to decode.
+        Channel units of other channels are skipped
+        by reading only their 4B header.
+
+    Returns
+    -------
+    chs: list[str]
+        Channel numbers.
+    chdatalist: list[np.ndarray]
+        int32 array of each channel.
+        Length of each array equals to its sampling frequency.
     """
-    # =======================
-    # split 1s bitdata into each channels
-    # =======================
-    # =======================
-    # starttime 6B
-    # =======================
-    starttime = __get_starttime__(bit1s)
-    
+    if chnumber is not None:
+        chnumber = {ch.upper() for ch in chnumber}
     # =======================
     # Channel unit data
     # =======================
-    # bit loc start after 1sec header
-    bitloc = 9*8
     chs = [] # channel number
-    bit1chs = [] # data of each channel
-    chdatalist = [] 
-    while bitloc < len(bit1s)-9*8:
-        logger.debug(f"{bitloc}/{len(bit1s)-9*8}")
-        
-        # channel number 2B -----------
-        chnum = int(bit1s[bitloc : bitloc+2*8].to01(),2)
-        chnum = format(chnum,'04x')
-        
-        # convert chnum to UPPER CASE
-        chnum = chnum.upper()
-        
+    chdatalist = [] # data of each channel
+    for chnum, sample_size, fs, loc in __scan_1ch_headers__(buf1s, chnumber):
         chs.append(chnum)
-        logger.debug(f"chnum: {chnum}")
-
-        # sample size [Byte] 0.5B -----------
-        sample_size = int(bit1s[bitloc+2*8 : bitloc+2*8+4].to01(),2)
-        if sample_size == 0:
-            bitstep = 4
-        elif sample_size == 1 or sample_size == 2 or sample_size == 3 or sample_size == 4:
-            bitstep = sample_size*8
-        elif sample_size == 5:
-            bitstep = 4*8
-        else:
-            raise ValueError(f"Unexpected sample size: {sample_size}.")
-        logger.debug(f"sample_size: {sample_size}")
-        logger.debug(f"bitstep: {bitstep}")
-        # sampling rate 1.5B -----------
-        fs =  int(bit1s[bitloc+2*8+4 : bitloc+4*8].to01(),2)
-        logger.debug(f"fs: {fs}Hz")
-        
-        # header 4B + data[0]4B + data[1:] ---------
-        n_1ch = 4*8 + 4*8 + bitstep*(fs-1)
-        if bitstep*(fs-1)%8 != 0:
-            n_1ch += 4
-        logger.debug(f"n_1ch: {n_1ch/8} B; {n_1ch} bit")
-        
-        # =======================
-        # data
-        # =======================
         chdatalist.append(
-            __read_1chbit__(
-                bit1s[bitloc:bitloc+n_1ch],
-                starttime = starttime,
-                )
+            __decode_1ch__(buf1s, sample_size, fs, offset=loc)
         )
-        
-        bit1chs.append(bit1s[bitloc:bitloc + n_1ch])
-        bitloc += n_1ch
     logger.debug(f"{len(chs)} ch segments are found.")
     return chs, chdatalist
-    
-    
-    # df = pd.Series(
-    #     chdatalist,
-    #     index = chs,
-    #     )
-    # if chnumber is not None:
-    #     if not isinstance(chnumber, list):
-    #         chnumber = [chnumber]
-    #     df = df.loc[chnumber]
-    # return df
-    
+
 def __1s_to_ch__(
-    bit1s:bitarray,
-    ) -> list[bitarray]:
+    buf1s,
+    ) -> list:
     """
     For debugging.
     Split 1 sec data to channel data.
     Use after __split1s__.
     (created 2024/09/21)
-    
+
     Parameters
     ----------
-    bitarray: bitarray
-        bitarray of 1 s WIN data.
+    buf1s: bytes-like
+        Bytes of 1 s WIN data.
     """
     # =======================
     # Channel unit data
     # =======================
-    # bit loc start after 1sec header
-    bitloc = 9*8
-    
+    # loc start after 1sec header
+    loc = SEC_HEADER_SIZE
+
     out = []
-    while bitloc < len(bit1s)-9*8:
-        logger.debug(f"{bitloc}/{len(bit1s)-9*8}")
-
-        # sample size [Byte] 0.5B -----------
-        sample_size = int(bit1s[bitloc+2*8 : bitloc+2*8+4].to01(),2)
-        if sample_size == 0:
-            bitstep = 4
-        elif sample_size == 1 or sample_size == 2 or sample_size == 3 or sample_size == 4:
-            bitstep = sample_size*8
-        elif sample_size == 5:
-            bitstep = 4*8
-        else:
-            raise ValueError(f"Unexpected sample size: {sample_size}.")
-        logger.debug(f"sample_size: {sample_size}")
-        logger.debug(f"bitstep: {bitstep}")
-        # sampling rate 1.5B -----------
-        fs =  int(bit1s[bitloc+2*8+4 : bitloc+4*8].to01(),2)
-        logger.debug(f"fs: {fs}Hz")
-        
-        # ch header 4B + data[0]4B + data[1:] ---------
-        n_1ch = 4*8 + 4*8 + bitstep*(fs-1)
-        if bitstep*(fs-1)%8 != 0:
-            n_1ch += 4
-        # logger.debug(f"n_1ch: {n_1ch/8} B; {n_1ch} bit")
-        
-        out.append(bit1s[bitloc:bitloc + n_1ch])
-        bitloc += n_1ch
-    # out.append(bit1s[bitloc:])
+    while loc + CH_HEADER_SIZE <= len(buf1s):
+        n_1ch = __read_chheader__(buf1s, loc)[3]
+        out.append(buf1s[loc:loc + n_1ch])
+        loc += n_1ch
     return out
-
-def __read_chheader__(
-    bit1ch:bitarray,
-    ):
-    """
-    Get channel header.
-    (created 2024/09/21)
-    """
-    bitloc = 0
-    # channel number 2B -----------
-    chnum = int(bit1ch[bitloc : bitloc+2*8].to01(),2)
-    chnum = format(chnum,'04x')
-    logger.debug(f"chnum: {chnum}")
-
-    # sample size [Byte] 0.5B -----------
-    sample_size = int(bit1ch[bitloc+2*8 : bitloc+2*8+4].to01(),2)
-    if sample_size == 0:
-        bitstep = 4
-    elif sample_size == 1 or sample_size == 2 or sample_size == 3 or sample_size == 4:
-        bitstep = sample_size*8
-    elif sample_size == 5:
-        bitstep = 4*8
-    else:
-        raise ValueError(f"Unexpected sample size: {sample_size}.")
-    logger.debug(f"sample_size: {sample_size}")
-    logger.debug(f"bitstep: {bitstep}")
-    # sampling rate 1.5B -----------
-    fs =  int(bit1ch[bitloc+2*8+4 : bitloc+4*8].to01(),2)
-    logger.debug(f"fs: {fs}Hz")
-    
-    # header 4B + data[0]4B + data[1:] ---------
-    n_1ch = 4*8 + 4*8 + bitstep*(fs-1)
-    
-    # logger.info(
-    #     f"\n{chnum:>4}|{sample_size:>1}|{fs:>3}\n"
-    #     f"{bit1ch[bitloc:bitloc+8*2].tobytes().hex()}|{bit1ch[bitloc+8*2:bitloc+8*2+4].tobytes().hex()}|{bit1ch[bitloc+8*2+4:bitloc+8*4].tobytes().hex()}")
-    
-    return chnum, sample_size, fs, n_1ch
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+Module for reading WIN data 1s segment by 1s segment.
+
+Unlike wingram.read, the data is not loaded at once,
+so long continuous archives can be processed in bounded memory.
+"""
+import os
+import glob
+import time
+from pathlib import Path
+
+from ....utils.log import logger
+from .parser import bit_parser
+
+def iter_seconds(
+    fp:str|list[str],
+    ch:str|list[str] = None,
+    use_mmap:bool = True,
+    resync:bool = False,
+):
+    """
+    Yield decoded 1s segments of WIN file(s) one by one.
+    Files are read in the given order.
+
+    Example
+    ----------
+    for t, data in wingram.iter_seconds(files, ch=["0200"]):
+        print(t, data["0200"].max())
+
+    Parameters
+    ----------
+    fp: str or list[str]
+        File path(s) of WIN data.
+        gzip/bz2/xz-compressed files and binary file-like objects
+        are decompressed and decoded block by block.
+    ch: str or list[str], optional
+        Channel numbers to decode. All channels are decoded if None.
+    use_mmap: bool, optional, default True
+        If True, memory-map the files instead of loading whole data.
+    resync: bool, optional, default False
+        If True, broken 1s segments are skipped.
+
+    Yields
+    ------
+    starttime: datetime.datetime
+        Start time of the 1s segment.
+    data: dict[str, np.ndarray]
+        int32 samples of the segment for each channel number.
+    """
+    if isinstance(fp, (str, Path)) or hasattr(fp, 'read'):
+        fp = [fp]
+    if isinstance(ch, str):
+        ch = [ch]
+
+    for f in fp:
+        logger.debug(f"Reading {f}")
+        for segment in bit_parser.__iter1s_file__(f, use_mmap=use_mmap, resync=resync):
+            starttime = bit_parser.__get_starttime__(segment)
+            chs, data = bit_parser.__split_1s_to_1ch__(
+                segment,
+                chnumber = ch,
+                )
+            yield starttime, dict(zip(chs, data))
+
+def __last_boundary__(
+    fp:str,
+) -> int:
+    """
+    Location of the end of the last complete 1s segment of fp [B].
+    The 4B size fields are followed from the beginning,
+    so a segment being written is not counted.
+    """
+    with open(fp, 'rb') as f:
+        filesize = os.fstat(f.fileno()).st_size
+        loc = 0
+        while loc + 4 <= filesize:
+            f.seek(loc)
+            bytesize = int.from_bytes(f.read(4), 'big')
+            if bytesize < bit_parser.SEC_HEADER_SIZE:
+                raise ValueError(f"Invalid size of 1s segment at {loc} B in {fp}: {bytesize} B")
+            if loc + bytesize > filesize:
+                # being written -----------
+                break
+            loc += bytesize
+    return loc
+
+def follow(
+    fp_pattern:str,
+    ch:str|list[str] = None,
+    interval:float = 1.0,
+    timeout:float = None,
+    from_start:bool = True,
+):
+    """
+    Follow WIN files that are still being written, like `tail -f`.
+    
+    The latest file matching fp_pattern is read from the last consumed
+    byte on each poll, and only 1s segments completely written 
+    (judged by their 4B size header) are decoded.
+    When a newer file appears (in the order of file name)
+    and the current one has no new data, it moves on to the newer file.
+
+    Example
+    ----------
+    for t, data in wingram.follow("/data/win/*", ch=["0200"]):
+        print(t, data["0200"].max())
+
+    Parameters
+    ----------
+    fp_pattern: str
+        Glob pattern of the WIN files.
+    ch: str or list[str], optional
+        Channel numbers to decode. All channels are decoded if None.
+    interval: float, optional, default 1.0
+        Interval of polling [s].
+    timeout: float, optional
+        Stop when no new data is found for timeout seconds.
+        Follow forever if None.
+    from_start: bool, optional, default True
+        If True, read the latest file from its beginning,
+        otherwise from the end of its last complete 1s segment.
+
+    Yields
+    ------
+    starttime: datetime.datetime
+        Start time of the 1s segment.
+    data: dict[str, np.ndarray]
+        int32 samples of the segment for each channel number.
+    """
+    if isinstance(ch, str):
+        ch = [ch]
+    
+    fp = None
+    offset = 0
+    lastupdate = time.monotonic()
+    while True:
+        files = sorted(glob.glob(fp_pattern))
+        # ----------------------
+        # first file
+        # ----------------------
+        if fp is None:
+            if len(files) == 0:
+                if timeout is not None and time.monotonic() - lastupdate > timeout:
+                    return
+                time.sleep(interval)
+                continue
+            fp = files[-1]
+            # st_size may be in the middle of a segment being written -----------
+            offset = 0 if from_start else __last_boundary__(fp)
+            logger.debug(f"Following {fp} from {offset} B")
+        
+        # ----------------------
+        # read new data
+        # ----------------------
+        with open(fp, 'rb') as f:
+            f.seek(offset)
+            buf = memoryview(f.read())
+        
+        loc = 0
+        while loc + 4 <= len(buf):
+            # 1s data length [4B] -----------
+            bytesize = int.from_bytes(buf[loc:loc+4], 'big')
+            if bytesize < bit_parser.SEC_HEADER_SIZE:
+                raise ValueError(f"Invalid size of 1s segment at {offset+loc} B in {fp}: {bytesize} B")
+            if loc + bytesize > len(buf):
+                # being written -----------
+                break
+            segment = buf[loc:loc+bytesize]
+            starttime = bit_parser.__get_starttime__(segment)
+            chs, data = bit_parser.__split_1s_to_1ch__(
+                segment,
+                chnumber = ch,
+                )
+            loc += bytesize
+            yield starttime, dict(zip(chs, data))
+        offset += loc
+        
+        if loc > 0:
+            lastupdate = time.monotonic()
+            continue
+        
+        # ----------------------
+        # roll over to the next file
+        # ----------------------
+        newer = [f for f in files if f > fp]
+        if len(newer) > 0:
+            if len(buf) > 0:
+                logger.warning(f"Incomplete last {len(buf)} B of {fp} is skipped.")
+            fp = newer[0]
+            offset = 0
+            logger.debug(f"Following {fp}")
+            continue
+        
+        if timeout is not None and time.monotonic() - lastupdate > timeout:
+            return
+        time.sleep(interval)
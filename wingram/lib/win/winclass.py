@@ -17,6 +17,8 @@ import os
 import re
 from pathlib import Path
 import copy
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import scipy
 from scipy.signal import butter, filtfilt, hilbert, decimate, detrend, correlate
@@ -24,7 +26,6 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import datetime
 
-from bitarray import bitarray
 
 from dataclasses import dataclass
 
@@ -34,8 +35,9 @@ from ...utils.unithandler import diff_unit, integrate_unit
 from ..chtable.reader import read_chtable
 from ..chtable.writer import mk_chtable
 from ..chtable.chtable_index import IDX as CHTABLE_IDX
-from .reader.core import __readwin__
-from .writer.helper import __1ch2bin__, __add_header__, __satisfy_sample_size__, __auto_sample_size__
+from .reader.core import __readwin__, __seconds2series__, __trim__
+from .reader.stream import iter_seconds
+from .writer.helper import __1ch2bin__, __add_header__, __satisfy_sample_size__, __auto_sample_size__, __auto_sample_sizes__
 
 # ##########################
 # WIN data
@@ -342,47 +344,102 @@ class WIN1ch:
     data: np.ndarray
         Data of the channel.
     time: np.ndarray
-        Time of the data.
+        Time of the data in datetime64[ns].
         Should has same size as data.
+        Equally spaced time is held as starttime and fs,
+        and the array is made only when it is accessed.
     params: Params
         Parameters of the data.
     """
     _ch: str = None
     ch:str = _ch
     data:np.ndarray = None
-    time:np.ndarray = None
     params = None
+    # explicit time axis -----------
+    _time = None
+    # implicit time axis -----------
+    _starttime = None
+    _fs = None
     
     # =======================
     # property
     # =======================
+    @property
+    def time(self):
+        """
+        Time of each sample in datetime64[ns].
+        """
+        if self._starttime is None:
+            return self._time
+        return self._starttime + self.__timeoffset__(np.arange(len(self.data)))
+    
+    @time.setter
+    def time(self, value):
+        """
+        Hold equally spaced time as starttime and fs.
+        Time within 1 us of the equally spaced time
+        (e.g. made by the reader in microsecond) is also regarded as such.
+        """
+        self._time = None
+        self._starttime = None
+        self._fs = None
+        if value is None:
+            return
+        value = np.asarray(value, dtype="datetime64[ns]")
+        if value.ndim == 1 and len(value) > 1:
+            span = (value[-1] - value[0]) / np.timedelta64(1, 's')
+            if span > 0:
+                fs = (len(value) - 1) / span
+                offset = value - value[0]
+                for _fs in (round(fs), fs):
+                    if _fs <= 0:
+                        continue
+                    error = np.abs(
+                        offset - np.round(np.arange(len(value)) * (1e9/_fs)).astype("timedelta64[ns]")
+                    )
+                    if np.max(error) <= np.timedelta64(1, 'us'):
+                        self.__set_timeaxis__(value[0], _fs)
+                        return
+        self._time = value
+    
     @property
     def fs(self):
         """
         A function to get sampling frequency from time axis.
         If sampling frequency is not constant, it will return None.
         """
+        if self._starttime is not None:
+            return self._fs
         return self.dt**-1
     
     @property
     def dt(self):
+        if self._starttime is not None:
+            return 1/self._fs
         if len(self.time) > 1:
-            dt = np.diff(self.time)
+            dt = np.diff(self.time) / np.timedelta64(1, 's')
             if np.max(dt) == np.min(dt):
-                dt = dt[0].item().total_seconds()
+                dt = dt[0]
             else:
                 logger.warning("sampling frequency is not constant.")
-                dt = np.array([_dt.item().total_seconds() for _dt in dt])
         elif len(self.time) == 1:
             dt = np.nan
         return dt
     
     @property
     def starttime(self):
-        return self.time[0].astype(datetime.datetime)
+        if self._starttime is not None:
+            _st = self._starttime
+        else:
+            _st = self._time[0]
+        return _st.astype("datetime64[us]").astype(datetime.datetime)
     @property
     def endtime(self):
-        return self.time[-1].astype(datetime.datetime)
+        if self._starttime is not None:
+            _et = self._starttime + self.__timeoffset__(len(self.data) - 1)
+        else:
+            _et = self._time[-1]
+        return _et.astype("datetime64[us]").astype(datetime.datetime)
     @property
     def timelength(self):
         return (self.endtime - self.starttime).total_seconds()
@@ -433,8 +490,8 @@ class WIN1ch:
         # check
         # =======================
         if (
-            (data is not None or time is None)
-            and (starttime is None and fs is None)
+            time is None
+            and (starttime is None or fs is None)
             ):
             raise AssertionError(
                 "Either time or starttime and fs must be given."
@@ -445,13 +502,7 @@ class WIN1ch:
             if time is not None:
                 self.time = time
             else:
-                _dt = datetime.timedelta(seconds=1/fs)
-                _endtime = starttime + datetime.timedelta(seconds=len(data)/fs)
-                self.time = np.arange(
-                    starttime,
-                    _endtime,
-                    _dt,
-                )
+                self.__set_timeaxis__(starttime, fs)
         
         if ch is not None:
             # if isinstance(ch, int):
@@ -484,7 +535,7 @@ class WIN1ch:
         txt += f"{self.ch} ({self.params.station}-{self.params.component})\t| "
         txt += f"fs: {self.fs} Hz, "
         txt += f"unit: {self.params.unit}\t| "
-        if isinstance(self.time, np.ndarray):
+        if self._starttime is not None or isinstance(self._time, np.ndarray):
             # WIN.dataから呼び出した際に，timeがndarrayでなく0番目の要素（datetime）として誤処理されるpandasのバグ?への対策
             st = self.starttime.strftime('%Y/%m/%dT%H:%M:%S')
             et = self.endtime.strftime('%Y/%m/%dT%H:%M:%S')
@@ -510,6 +561,18 @@ class WIN1ch:
             outdata.ch = self.ch
             outdata.params = self.params
             outdata.data = self.data[key]
+            if (
+                self._starttime is not None 
+                and isinstance(key, slice)
+                ):
+                start, _, step = key.indices(len(self.data))
+                if step > 0:
+                    # index arithmetic on implicit time axis -----------
+                    outdata.__set_timeaxis__(
+                        self._starttime + self.__timeoffset__(start),
+                        self._fs / step,
+                    )
+                    return outdata
             outdata.time = self.time[key]
             return outdata
         else:
@@ -555,17 +618,10 @@ class WIN1ch:
             raise ValueError(f"Input must be Obspy Trace class, not {type(tr)}.")
         out = WIN1ch()
         out.data = tr.data
-        
-        st = tr.stats.starttime.datetime
-        et = tr.stats.endtime.datetime
-        dt = datetime.timedelta(seconds=tr.stats.delta)
-        time = np.arange(
-            st,
-            et + dt,
-            dt,
+        out.__set_timeaxis__(
+            tr.stats.starttime.datetime,
+            tr.stats.sampling_rate,
         )
-        # time = time.astype(np.datetime64)
-        out.time = time
         # out.get_fs()
         # if tr.stats.station == "":
         #     out.ch = tr.stats.channel
@@ -579,6 +635,53 @@ class WIN1ch:
     # =======================
     # basic
     # =======================
+    def __set_timeaxis__(
+        self,
+        starttime:datetime.datetime|np.datetime64,
+        fs:float,
+        ):
+        """
+        Set implicit time axis of equally spaced samples.
+        """
+        self._time = None
+        self._starttime = np.datetime64(starttime, 'ns')
+        self._fs = fs
+        return self
+    
+    def __timeoffset__(
+        self,
+        idx:int|np.ndarray,
+        ):
+        """
+        Time from the start of implicit time axis to sample(s) idx.
+        """
+        return np.round(np.asarray(idx) * (1e9/self._fs)).astype("timedelta64[ns]")
+    
+    def __searchtime__(
+        self,
+        time:datetime.datetime,
+        side:str = 'left',
+        ) -> int:
+        """
+        np.searchsorted(self.time, time, side) on implicit time axis
+        without making the time array.
+        """
+        time = np.datetime64(time, 'ns')
+        n = len(self.data)
+        if side == 'left':
+            found = lambda i: self._starttime + self.__timeoffset__(i) >= time
+        else:
+            found = lambda i: self._starttime + self.__timeoffset__(i) > time
+        
+        # estimate and correct rounding -----------
+        i = (time - self._starttime) / np.timedelta64(1, 's') * self._fs
+        i = int(min(max(np.ceil(i), 0), n))
+        while i > 0 and found(i-1):
+            i -= 1
+        while i < n and not found(i):
+            i += 1
+        return i
+    
     # def get_fs(self):
     #     """
     #     A function to get sampling frequency from time axis and hold it in self.fs.
@@ -655,12 +758,10 @@ class WIN1ch:
         # ----------------------
         # main
         # ----------------------
-        _dt = datetime.timedelta(seconds=self.dt)
-        self.time = np.arange(
-            self.starttime + timedelta,
-            self.endtime + timedelta + _dt,
-            _dt,
-        )
+        if self._starttime is not None:
+            self._starttime = self._starttime + np.timedelta64(timedelta)
+        else:
+            self._time = self._time + np.timedelta64(timedelta)
         return self
     
     def demean(self):
@@ -761,7 +862,10 @@ class WIN1ch:
             q,
             zero_phase=True,
             )
-        self.time = self.time[::q]
+        if self._starttime is not None:
+            self._fs = self._fs / q
+        else:
+            self._time = self._time[::q]
         
         self.params.fmax = new_fs/2
         return self
@@ -793,18 +897,32 @@ class WIN1ch:
         # ----------------------
         # find index
         # ----------------------
-        if starttime is not None:
-            idx_start = np.where(self.time >= starttime)[0][0]
-        else:
-            idx_start = 0
-            
-        if endtime is not None:
-            if contain_end:
-                idx_end = np.where(self.time <= endtime)[0][-1]
+        if self._starttime is not None:
+            # index arithmetic on implicit time axis -----------
+            if starttime is not None:
+                idx_start = self.__searchtime__(starttime, side='left')
             else:
-                idx_end = np.where(self.time < endtime)[0][-1]
+                idx_start = 0
+            if endtime is not None:
+                idx_end = self.__searchtime__(
+                    endtime, 
+                    side = 'right' if contain_end else 'left',
+                    ) - 1
+            else:
+                idx_end = len(self.data)-1
         else:
-            idx_end = len(self.time)-1
+            if starttime is not None:
+                idx_start = np.where(self._time >= np.datetime64(starttime))[0][0]
+            else:
+                idx_start = 0
+                
+            if endtime is not None:
+                if contain_end:
+                    idx_end = np.where(self._time <= np.datetime64(endtime))[0][-1]
+                else:
+                    idx_end = np.where(self._time < np.datetime64(endtime))[0][-1]
+            else:
+                idx_end = len(self._time)-1
         
         # ----------------------
         # trim
@@ -864,7 +982,7 @@ class WIN1ch:
         sample_size:int = None,
         boundary = "cut",
         force_make_int:bool = False,
-        ) -> tuple[list[datetime.datetime],list[bitarray]]:
+        ) -> tuple[list[datetime.datetime],list[bytes]]:
         data = self.copy()
         # =======================
         # check
@@ -897,74 +1015,108 @@ class WIN1ch:
         # =======================
         st = data.starttime
         et = data.endtime
+        # the last sample is at the end of its second -----------
+        full_last = abs(et.microsecond - (1-data.dt)*10**6) < 1
         if boundary == "cut":
             if st.microsecond == 0:
                 winst = st
             else:
                 winst = st + datetime.timedelta(microseconds=1000000-st.microsecond)
                 logger.warning(f"{self.ch}: Cutting the first {st.microsecond/1e6} s.")
-            if et.microsecond == (1-data.dt)*10**6:
+            if full_last:
                 winet = et
             else:
                 winet = et - datetime.timedelta(microseconds=et.microsecond)
                 logger.warning(f"{self.ch}: Cutting the last {et.microsecond/1e6} s.")
-                
-            data.trim(
-                starttime = winst,
-                endtime = winet,
-                contain_end=True,
-            )
-        elif boundary == "padding" or 'zero-padding':
+        elif boundary in ("padding", "zero-padding"):
             if st.microsecond == 0:
                 winst = st
             else:
                 winst = st - datetime.timedelta(microseconds=st.microsecond)
-            if et.microsecond == (1-data.dt)*10**6:
+            if full_last:
                 winet = et
             else:
                 winet = et + datetime.timedelta(microseconds=1000000-et.microsecond)
             
             # padding data -----------
-            st_pad_data = (np.ones(
-                int((st - winst).total_seconds() * data.fs),
-            )*data.data[0]).astype(int)
-            et_pad_data = (np.ones(
-                int((winet - et).total_seconds() * data.fs),
-            )*data.data[-1]).astype(int)
+            st_pad_data = np.full(
+                round((st - winst).total_seconds() * data.fs),
+                data.data[0],
+            ).astype(int)
+            et_pad_data = np.full(
+                round((winet - et).total_seconds() * data.fs),
+                data.data[-1],
+            ).astype(int)
             
             if boundary == "zero-padding":
-                et_pad_data *= 0
+                st_pad_data *= 0
                 et_pad_data *= 0
             
             newdata = np.concatenate([st_pad_data, data.data, et_pad_data])
             
-            newtime = np.arange(
-                winst,
-                winet + datetime.timedelta(seconds=data.dt),
-                datetime.timedelta(seconds=data.dt),
-            )
-            if len(newdata) != len(newtime):
-                raise ValueError(f"Length of padded data ({len(newdata)}) and time ({len(newtime)}) is different.")
+            fs = data.fs
+            n_newtime = int(round((winet - winst).total_seconds() * fs)) + 1
+            if len(newdata) != n_newtime:
+                raise ValueError(f"Length of padded data ({len(newdata)}) and time ({n_newtime}) is different.")
             data.data = newdata
-            data.time = newtime
+            data.__set_timeaxis__(winst, fs)
+        else:
+            raise ValueError(f"Unknown boundary: {boundary}. It should be 'cut', 'padding' or 'zero-padding'.")
 
-        n_section = int(np.ceil((winet - winst).total_seconds()))
+        # =======================
+        # index of each 1s section
+        # =======================
+        if full_last:
+            # winet is the last sample (e.g. on a whole second at fs=1) -----------
+            n_section = int(np.floor((winet - winst).total_seconds())) + 1
+        else:
+            n_section = int(np.ceil((winet - winst).total_seconds()))
+        edges = [winst + datetime.timedelta(seconds=i) for i in range(n_section+1)]
+        if data._starttime is not None:
+            idx = [data.__searchtime__(edge) for edge in edges]
+        else:
+            idx = np.searchsorted(data._time, np.array(edges, dtype="datetime64[ns]")).tolist()
+        
+        # =======================
+        # sample size of all full sections at once
+        # =======================
+        sizes = [sample_size]*n_section
+        if (
+            sample_size is None 
+            and n_section > 0 
+            and data._starttime is not None 
+            and float(data._fs).is_integer()
+            ):
+            fs = int(data._fs)
+            full = np.flatnonzero(np.diff(idx) == fs)
+            if len(full) > 0:
+                blocks = data.data[np.asarray(idx)[full][:, None] + np.arange(fs)]
+                for i, size in zip(full.tolist(), __auto_sample_sizes__(blocks).tolist()):
+                    sizes[i] = size
         
-        stlist = [None]*n_section
-        outlist = [None]*n_section
+        chnumber = int(data.ch, 16)
+        stlist = []
+        outlist = []
         for i in range(n_section):
-            _temp1s = data.trim(
-                starttime = winst + datetime.timedelta(seconds=i),
-                endtime = winst + datetime.timedelta(seconds=i+1),
-                contain_end = False,
+            i0, i1 = idx[i], idx[i+1]
+            if i0 >= i1:
+                # no data in the second -----------
+                continue
+            if data._starttime is not None:
+                _st = data._starttime + data.__timeoffset__(i0)
+                fs = data._fs
+            else:
+                _st = data._time[i0]
+                fs = WIN1ch(data.data[i0:i1], time=data._time[i0:i1]).fs
+            stlist.append(_st.astype("datetime64[us]").astype(datetime.datetime))
+            outlist.append(
+                __1ch2bin__(
+                    data = data.data[i0:i1],
+                    fs = fs,
+                    chnumber = chnumber,
+                    sample_size = sizes[i],
+                    force_make_int = force_make_int,
                 )
-            stlist[i] = _temp1s.starttime
-            outlist[i] = __1ch2bin__(
-                data = _temp1s.data,
-                fs = _temp1s.fs,
-                chnumber = int(_temp1s.ch,16),
-                sample_size = sample_size,
-                force_make_int = force_make_int,
             )
         outsr = pd.Series(outlist, index = stlist)
         return outsr
@@ -974,14 +1126,13 @@ class WIN1ch:
         Write WIN file.
         """
         bitdf = self.__to_bit__(**kwargs)
-        out = bitarray()
-        # return bitdf
-        for i in range(len(bitdf)):
-            _tmp = __add_header__(
-                    bitdf.iloc[i],
-                    starttime = bitdf.index[i],
-                )
-            out.extend(_tmp)
+        out = b"".join(
+            __add_header__(
+                bitdf.iloc[i],
+                starttime = bitdf.index[i],
+            )
+            for i in range(len(bitdf))
+        )
         with open(fp, "wb") as f:
             f.write(out)
             logger.info(f"Saved: {fp}")
@@ -1036,6 +1187,34 @@ class WIN1ch:
         return fig, ax
     
 
+# ##########################
+# parallel encoding
+# ##########################
+def __to_bit_shared__(
+    job:tuple,
+) -> pd.Series:
+    """
+    WIN1ch.__to_bit__ in a worker process.
+    The samples are read from shared memory instead of being pickled.
+    
+    Parameters
+    ----------
+    job: tuple
+        (shell, shm_name, shape, dtype, kwargs),
+        where shell is WIN1ch without data 
+        and kwargs are given to __to_bit__.
+    """
+    shell, shm_name, shape, dtype, kwargs = job
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        shell.data = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        # __to_bit__ works on its own copy of data -----------
+        out = shell.__to_bit__(**kwargs)
+        shell.data = None
+    finally:
+        shm.close()
+    return out
+
 @dataclass
 class WIN:
     """
@@ -1067,8 +1246,45 @@ class WIN:
         for i in range(len(self.data)):
             value_out.append(self.data.iloc[i].params.chtable)
         return pd.DataFrame(value_out, columns = CHTABLE_IDX)
-            
-    
+
+    @property
+    def group_ch(self) -> dict[float, list[str]]:
+        """
+        Channel numbers grouped by sampling frequency in the order of data.
+        Channels whose sampling frequency is not constant are excluded.
+        """
+        out = {}
+        for i in range(len(self.data)):
+            tmp = self.data.iloc[i]
+            if tmp._starttime is None or len(tmp.data) == 0:
+                continue
+            fs = int(tmp._fs) if float(tmp._fs).is_integer() else tmp._fs
+            out.setdefault(fs, []).append(tmp.ch)
+        return out
+
+    @property
+    def groups(self) -> dict[float, np.ndarray]:
+        """
+        Data of the channels of each sampling frequency stacked into
+        a 2D array of shape (n_ch, n_samples), e.g. self.groups[100].
+        Rows are in the order of self.group_ch[fs],
+        and the columns are cut to the time range common to the channels.
+        The arrays are made when accessed.
+        """
+        out = {}
+        for fs, chs in self.group_ch.items():
+            traces = [self.data.loc[ch] for ch in chs]
+            # common time range -----------
+            st = max(tmp._starttime for tmp in traces)
+            et = min(tmp._starttime + tmp.__timeoffset__(len(tmp.data)) for tmp in traces)
+            starts = [tmp.__searchtime__(st) for tmp in traces]
+            n = max(0, min(tmp.__searchtime__(et) - i0 for tmp, i0 in zip(traces, starts)))
+            if any(len(tmp.data) != n for tmp in traces):
+                logger.debug(f"Channels of {fs} Hz are cut to {n} common samples.")
+            out[fs] = np.stack([tmp.data[i0:i0+n] for tmp, i0 in zip(traces, starts)])
+        return out
+
+
     def __repr__(self):
         txt = ""
         txt += f"fp: {self.fp}, chtablefp: {self.chtablefp}\n"
@@ -1172,6 +1388,12 @@ class WIN:
         starttime:datetime.datetime = None,
         endtime:datetime.datetime = None,
         filenameformat:str = None,
+        use_mmap:bool = True,
+        use_index:bool = False,
+        n_jobs:int = None,
+        executor = None,
+        fill_value = None,
+        resync:bool = False,
         ):
         """
         Read WIN files.
@@ -1184,6 +1406,10 @@ class WIN:
         ----------
         fp: list[str]
             File path of WIN data.
+            gzip/bz2/xz-compressed files are decompressed in memory.
+            Binary file-like objects are also accepted,
+            but they are read without the index file and serially
+            even if use_index or n_jobs/executor is given.
         sort: bool, optional, default True
             If True, sort the returned data by channel number.
         ch: list[str], optional
@@ -1200,11 +1426,33 @@ class WIN:
             End time to read data. Used with starttime.
         filenameformat: str, optional
             Format of the file name.
+        use_mmap: bool, optional, default True
+            If True, memory-map the files instead of loading whole data.
+        use_index: bool, optional, default False
+            If True, make (or reuse) the index file (fp+".idx") of each file
+            and read only the 1s segments and channels needed.
+            Not used for file-like objects.
+        n_jobs: int, optional
+            Number of worker processes to decode the files.
+            -1 means the number of CPUs. If None, files are read serially.
+            A single file is split into ranges of 1s segments.
+            File-like objects are read serially.
+        executor: concurrent.futures.Executor, optional
+            Executor used instead of making a process pool with n_jobs.
+            It is not shut down after reading.
+        fill_value: optional
+            If given, missing seconds of each channel are filled with it
+            so that the time axis is continuous.
+            np.nan makes the data float.
+        resync: bool, optional, default False
+            If True, broken 1s segments are skipped
+            up to the next valid one instead of raising an error.
+            Not used with use_index.
         """
         # ----------------------
         # check
         # ----------------------
-        if isinstance(fp, str):
+        if isinstance(fp, str) or hasattr(fp, 'read'):
             fp = [fp]
         
         if starttime is not None and endtime is not None:
@@ -1228,17 +1476,40 @@ class WIN:
             beforesec = beforesec,
             aftersec = aftersec,
             filenameformat = filenameformat,
+            use_mmap = use_mmap,
+            use_index = use_index,
+            n_jobs = n_jobs,
+            executor = executor,
+            fill_value = fill_value,
+            resync = resync,
         )
         
         # ----------------------
         # Convert to WIN1ch class
         # ----------------------
+        data = self.__set_rawdata__(data, sort=sort)
+        self.fp = fp
+        return data
+    
+    def __set_rawdata__(
+        self,
+        data:pd.Series,
+        sort:bool = True,
+        )->pd.Series:
+        """
+        Convert Series of (data, time) given by the reader
+        into Series of WIN1ch and hold it.
+        time may be (starttime, fs) of equally spaced samples.
+        """
         for i in range(len(data)):
             tmp = WIN1ch()
             tmp.params = Params(tmp)
-            tar = data.iloc[i]
-            tmp.data = tar[0].astype(int)
-            tmp.time = tar[1].astype(np.datetime64)
+            tmp.data, time = data.iloc[i]
+            if isinstance(time, tuple):
+                # equally spaced samples of (starttime, fs) -----------
+                tmp.__set_timeaxis__(*time)
+            else:
+                tmp.time = time
             tmp.ch = data.index[i]
             # tmp.get_fs()
             
@@ -1247,8 +1518,114 @@ class WIN:
         if sort:
            data.sort_index(inplace=True)
         self.data = data
-        self.fp = fp
         return data
+    
+    @staticmethod
+    def iter_windows(
+        fp:list[str],
+        window:float = 60,
+        overlap:float = 0,
+        ch:list[str] = None,
+        sort:bool = True,
+        use_mmap:bool = True,
+        ):
+        """
+        Read WIN files window by window.
+        Each 1s segment is decoded only once
+        and reused for the overlapping part of the next window.
+        
+        Example
+        ----------
+        for win in wingram.WIN.iter_windows(files, window=60, overlap=5):
+            win.bandpass(1, 10)
+        
+        Parameters
+        ----------
+        fp: list[str]
+            File paths of WIN data in time order.
+        window: float, optional, default 60
+            Length of each window [s].
+            Windows not on whole seconds are trimmed from the 1s segments.
+        overlap: float, optional, default 0
+            Overlap between consecutive windows [s].
+        ch: list[str], optional
+            List of channel number to exclusively read.
+        sort: bool, optional, default True
+            If True, sort the channels of each window by channel number.
+        use_mmap: bool, optional, default True
+            If True, memory-map the files instead of loading whole data.
+        
+        Yields
+        ------
+        win: WIN
+            Data in [starttime, starttime + window) of each window.
+        """
+        # ----------------------
+        # check
+        # ----------------------
+        if window <= 0:
+            raise ValueError(f"Window must be positive: {window}")
+        if overlap < 0 or overlap >= window:
+            raise ValueError(f"Overlap must be in [0, window): {overlap}")
+        if isinstance(fp, (str, Path)):
+            fp = [fp]
+        window = datetime.timedelta(seconds=window)
+        step = window - datetime.timedelta(seconds=overlap)
+        sec = datetime.timedelta(seconds=1)
+        
+        def _mkwin(seconds, st, et):
+            data = __seconds2series__(seconds)
+            # window may start or end in the middle of a second -----------
+            for i in range(len(data)):
+                data.iloc[i] = __trim__(*data.iloc[i], st, et)
+            data = data[[len(d) > 0 for d, _ in data]]
+            out = WIN()
+            out.__set_rawdata__(data, sort=sort)
+            out.fp = fp
+            return out
+        
+        # ----------------------
+        # main
+        # ----------------------
+        buffer = {} # start time of 1s segment: {ch: samples}
+        winst = None
+        lastet = None # end time of the last window yielded
+        for sectime, secdata in iter_seconds(fp, ch=ch, use_mmap=use_mmap):
+            if winst is None:
+                winst = sectime
+            # emit windows finished before this segment -----------
+            while sectime >= winst + window:
+                # segments overlapping the window -----------
+                seconds = [
+                    (t, buffer[t]) for t in sorted(buffer)
+                    if winst < t + sec and t < winst + window
+                    ]
+                if len(seconds) > 0:
+                    yield _mkwin(seconds, winst, winst + window)
+                    lastet = winst + window
+                winst += step
+                buffer = {t: d for t, d in buffer.items() if t + sec > winst}
+            
+            if sectime + sec > winst:
+                # keep the first one if the segment is duplicated
+                buffer.setdefault(sectime, secdata)
+        
+        # ----------------------
+        # windows in the last segment and the last (partial) window
+        # ----------------------
+        if len(buffer) == 0:
+            return
+        dataet = max(buffer) + sec
+        while lastet is None or dataet > lastet:
+            seconds = [
+                (t, buffer[t]) for t in sorted(buffer)
+                if winst < t + sec and t < winst + window
+                ]
+            if len(seconds) > 0:
+                yield _mkwin(seconds, winst, winst + window)
+            lastet = winst + window
+            winst += step
+        return
         
     def read_chtable(
         self,
@@ -1481,11 +1858,15 @@ class WIN:
         self,
         sample_size:int = None,
         boundary:str = "cut",
+        n_jobs:int = None,
+        executor = None,
         **kwargs,
-        )->bitarray:
+        )->pd.DataFrame:
         """
         Convert to WIN binary format.
-        Return DataFrame of bitarray for each 1s vs ch.
+        Return DataFrame of bytes for each 1s vs ch.
+        If n_jobs or executor is given, channels are encoded 
+        in worker processes reading samples from shared memory.
         """
         # =======================
         # check
@@ -1502,18 +1883,68 @@ class WIN:
         # =======================
         # split data into 1s
         # =======================
-        bitsr = [None]*len(self)
-        for i in range(len(self)):
-            bitsr[i] = self.data.iloc[i].__to_bit__(
-                sample_size = sample_size[i],
-                boundary = boundary,
-                **kwargs,
+        if n_jobs is not None and n_jobs < 0:
+            n_jobs = os.cpu_count()
+        parallel = executor is not None or (n_jobs is not None and n_jobs > 1)
+        if parallel and len(self) > 1:
+            bitsr = self.__to_bit_parallel__(
+                [dict(sample_size=sample_size[i], boundary=boundary, **kwargs) for i in range(len(self))],
+                n_jobs = n_jobs,
+                executor = executor,
             )
+        else:
+            bitsr = [None]*len(self)
+            for i in range(len(self)):
+                bitsr[i] = self.data.iloc[i].__to_bit__(
+                    sample_size = sample_size[i],
+                    boundary = boundary,
+                    **kwargs,
+                )
         bitdf = pd.concat(bitsr, axis=1)
         bitdf.sort_index(axis=0, inplace=True)
         bitdf.columns = self.data.index
         return bitdf
     
+    def __to_bit_parallel__(
+        self,
+        kwargslist:list[dict],
+        n_jobs:int = None,
+        executor = None,
+        )->list[pd.Series]:
+        """
+        WIN1ch.__to_bit__ of each channel in worker processes.
+        Samples are put in shared memory and the other attributes are pickled.
+        """
+        shms = []
+        jobs = []
+        try:
+            for i in range(len(self)):
+                tr = self.data.iloc[i]
+                data = np.ascontiguousarray(tr.data)
+                shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+                shms.append(shm)
+                np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[:] = data
+                
+                # WIN1ch without data -----------
+                shell = WIN1ch()
+                shell.params = copy.copy(tr.params)
+                shell.params.parent = shell
+                shell.ch = tr.ch
+                shell._time = tr._time
+                shell._starttime = tr._starttime
+                shell._fs = tr._fs
+                jobs.append((shell, shm.name, data.shape, data.dtype, kwargslist[i]))
+            
+            if executor is not None:
+                return list(executor.map(__to_bit_shared__, jobs))
+            logger.debug(f"Encoding {len(jobs)} channels with {n_jobs} processes.")
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(jobs))) as pool:
+                return list(pool.map(__to_bit_shared__, jobs))
+        finally:
+            for shm in shms:
+                shm.close()
+                shm.unlink()
+    
     def write(
         self,
         savename:str = None,
@@ -1521,6 +1952,8 @@ class WIN:
         sample_size:int = None,
         boundary:str = "cut",
         out_chtable:bool = True,
+        n_jobs:int = None,
+        executor = None,
         **kwargs,
         )->None:
         """
@@ -1538,28 +1971,31 @@ class WIN:
         boundary: str, optional
             Boundary condition for the data.
             "cut" or "padding" or "zero-padding"
+        n_jobs: int, optional
+            Number of worker processes to encode the channels.
+            -1 means the number of CPUs. If None, channels are encoded serially.
+        executor: concurrent.futures.Executor, optional
+            Executor used instead of making a process pool with n_jobs.
+            It is not shut down after writing.
         """
         
         bitdf = self.__to_bit__(
             sample_size = sample_size,
             boundary = boundary,
+            n_jobs = n_jobs,
+            executor = executor,
             **kwargs,
         )
         
-        # concat ch bitarrays sharing time -----------
+        # concat ch bytes sharing time -----------
         bit1s = [None]*len(bitdf)
         for t in range(len(bitdf)):
-            _tmpba = bitarray()
-            for c in range(len(bitdf.iloc[t])):
-                _tmpba.extend(bitdf.iloc[t,c])
             bit1s[t] = __add_header__(
-                _tmpba,
+                # channels without the second are NaN -----------
+                b"".join(b for b in bitdf.iloc[t] if isinstance(b, bytes)),
                 bitdf.index[t],
             )
-            
-        out = bitarray()
-        for i in range(len(bit1s)):
-            out.extend(bit1s[i])
+        out = b"".join(bit1s)
         
         # ----------------------
         # write
@@ -1,14 +1,12 @@
 import numpy as np
 import datetime
-import bitarray
-from ....utils.int_bit import int2bin, intarray2bin
 from ....utils.log import logger
 
 # ======================
 # HELPER
 # ======================
 def __add_header__(
-    badata: bitarray.bitarray,
+    badata: bytes,
     starttime: datetime.datetime = None,
     yy:int = None,
     mm:int = None,
@@ -16,7 +14,7 @@ def __add_header__(
     HH:int = None,
     MM:int = None,
     SS:int = None,
-) -> bitarray.bitarray:
+) -> bytes:
     """
     Add header to data of channels.
     This function completes the 1s WIN format data
@@ -29,7 +27,7 @@ def __add_header__(
     
     Parameters
     ----------
-    badata : bitarray.bitarray
+    badata : bytes
         Binary data of 1 or more channels.
     starttime : datetime.datetime
         Start time of the data.
@@ -48,7 +46,7 @@ def __add_header__(
         
     Returns
     -------
-    out: bitarray.bitarray
+    out: bytes
         1s data with header in WIN format.
     """
     # ##########################
@@ -83,35 +81,22 @@ def __add_header__(
     # ##########################
     # Header
     # ##########################
-    out = bitarray.bitarray()
     # =======================
     # whole byte size[4B]
     # =======================
-    # header[10B] + (badata[bit]/8)[B]
-    wholebyte = int(10 + (len(badata))/8)
-    out.extend(int2bin(wholebyte,32,signed=False))
+    # header[10B] + badata[B]
+    wholebyte = 10 + len(badata)
     
     # =======================
     # start time [6B]
     # =======================
-    out.extend(int2bin(yy//10,4,signed=False))
-    out.extend(int2bin(yy%10,4,signed=False))
-    out.extend(int2bin(mm//10,4,signed=False))
-    out.extend(int2bin(mm%10,4,signed=False))
-    out.extend(int2bin(dd//10,4,signed=False))
-    out.extend(int2bin(dd%10,4,signed=False))
-    out.extend(int2bin(HH//10,4,signed=False))
-    out.extend(int2bin(HH%10,4,signed=False))
-    out.extend(int2bin(MM//10,4,signed=False))
-    out.extend(int2bin(MM%10,4,signed=False))
-    out.extend(int2bin(SS//10,4,signed=False))
-    out.extend(int2bin(SS%10,4,signed=False))
+    # 2 digits of BCD in each byte -----------
+    bcd = bytes((v//10) << 4 | (v%10) for v in (yy, mm, dd, HH, MM, SS))
     
     # ##########################
     # Output
     # ##########################
-    out.extend(badata)
-    return out
+    return wholebyte.to_bytes(4, 'big', signed=False) + bcd + bytes(badata)
     
 
 def __satisfy_sample_size__(
@@ -185,13 +170,63 @@ def __auto_sample_size__(
             return s
     raise ValueError("No sample size satisfies the data.")
 
+# range of differences [-lim, lim-1] for sample size 0,1,2,3,4 -----------
+DIFF_LIMITS = np.array([2**3, 2**7, 2**15, 2**23, 2**31], dtype=np.int64)
+
+def __auto_sample_sizes__(
+    blocks: np.ndarray,
+) -> np.ndarray:
+    """
+    Find the smallest sample size of many 1s blocks at once.
+    Same as __auto_sample_size__ applied to each block.
+    
+    Parameters
+    ----------
+    blocks: np.ndarray
+        Integer samples of shape (..., fs), e.g. (n_ch, n_sec, fs).
+    
+    Returns
+    -------
+    sample_size: np.ndarray
+        Sample size of shape (...).
+    """
+    blocks = np.asarray(blocks)
+    shape = blocks.shape[:-1]
+    if blocks.shape[-1] == 0:
+        raise ValueError("No sample size satisfies the data.")
+    
+    # largest differences of each block -----------
+    if blocks.shape[-1] > 1:
+        diff = blocks[..., 1:] - blocks[..., :-1]
+        lo = diff.min(axis=-1).astype(np.int64)
+        hi = diff.max(axis=-1).astype(np.int64)
+    else:
+        lo = np.zeros(shape, dtype=np.int64)
+        hi = np.zeros(shape, dtype=np.int64)
+    
+    # first sample is 4B in sample size 0-4 -----------
+    first = blocks[..., 0]
+    first_ok = (-2**31 <= first) & (first <= 2**31-1)
+    ok = (
+        (-DIFF_LIMITS <= lo[..., None]) 
+        & (hi[..., None] <= DIFF_LIMITS-1) 
+        & first_ok[..., None]
+    )
+    out = np.where(ok.any(axis=-1), ok.argmax(axis=-1), 5)
+    
+    # sample size 5 holds amplitude in 4B -----------
+    amp_ok = (-2**31 <= blocks.min(axis=-1)) & (blocks.max(axis=-1) <= 2**31-1)
+    if not np.all(amp_ok | (out < 5)):
+        raise ValueError("No sample size satisfies the data.")
+    return out
+
 def __1ch2bin__(
     data:np.ndarray,
     fs:int,
     chnumber:int = 0x10,
     sample_size:int = None,
     force_make_int:bool = True,
-    ) -> bitarray:
+    ) -> bytes:
     """
     Return a byte string converted from input data array.
     samplesize 5 is supported by only win version > 3.
@@ -220,7 +255,8 @@ def __1ch2bin__(
     
     Returns
     -------
-    
+    out: bytes
+        Channel header and samples of 1s data in WIN format.
     """
     # ##########################
     # Check input
@@ -247,84 +283,60 @@ def __1ch2bin__(
     
     if len(data) > fs:
         raise AssertionError(f"1s data length {len(data)} is inconsistent to sampling frequency {fs}Hz.")
-    # ##########################
-    # Prepare output
-    # ##########################
-    out = bitarray.bitarray()
+    if not (0 <= int(fs) <= 0xFFF):
+        raise ValueError(f"Sampling frequency {fs} is out of range of 12-bit unsigned integer: [0,{0xFFF}]")
     
     # #####################
     # CHANNEL HEADER [4B]
     # #####################
-    # ======================
-    # ch number [2B]
-    # ======================
-    # write --------
-    out.extend(
-        int2bin(int(chnumber),16,signed=False)
-    )
-    # ======================
-    # data size[0.5B], fs [1.5B]
-    # ======================
-    # write --------
-    out.extend(
-        int2bin(int(sample_size),4,signed=False)
-    )
-    out.extend(
-        int2bin(int(fs),12,signed=False)
-    )
+    # ch number [2B], data size[0.5B], fs [1.5B] -----------
+    header = int(chnumber).to_bytes(2, 'big', signed=False)
+    header += (int(sample_size) << 12 | int(fs)).to_bytes(2, 'big', signed=False)
     
     # #######################
-    # data [4B] 
+    # data
     # #######################
-    # ======================
-    # Convert data into byte strings 
-    # ======================
     if sample_size == 5:
-        _bin_data = intarray2bin(
-            data,
-            int(sample_size*8),
-            signed=True,
-            )
-        out.extend(_bin_data)
-        # for d in data:
-        #     out.extend(
-        #         int2bin(d,32,signed=True)
-        #     )
+        return header + __encode_samples__(data, 32).tobytes()
+    
+    # sample_size = 0,1,2,3,4
+    # First Sample [4B] -------------
+    first = __encode_samples__(data[:1], 32).tobytes()
+    # Rest Samples ------------
+    _data = data[1:] - data[:-1]
+    if sample_size == 0:
+        rest = __pack_nibbles__(__encode_samples__(_data, 4))
     else:
-        # sample_size = 0,1,2,3,4
-        # First Sample -------------
-        out.extend(
-            bitarray.bitarray(
-                "".join(int2bin(data[0],32,signed=True))
-            )
-        )
-        # Rest Samples ------------
-        if sample_size == 0:
-            sample_size = 0.5
-        
-        if len(data) > 0:
-            _data = data[1:] - data[:-1]
-            _bin_data = intarray2bin(
-                _data,
-                int(sample_size*8),
-                signed=True,
-                )
-            out.extend(
-                bitarray.bitarray(
-                    "".join(_bin_data)
-                )
-            )
-            # for i in range(len(_bin_data)):
-            #     out.extend(
+        rest = __encode_samples__(_data, 8*sample_size)
+    return header + first + rest.tobytes()
 
-            #     )
-    
-    # =======================
-    # Check before return
-    # =======================
-    if sample_size==0.5 and len(out) % 8 != 0:
-        out.extend('0'*4)
-        
-    if len(out) % 8 != 0:
-        raise ValueError(f"Output data length {len(out)} is not aligned to 8-bit.")
-    return out
+def __encode_samples__(
+    data:np.ndarray,
+    nbit:int,
+    ) -> np.ndarray:
+    """
+    Encode signed integers into big endian nbit 2's complement.
+    Return uint8 array of bytes for nbit = 8, 16, 24, 32,
+    and uint8 array of 4-bit values (one in each byte) for nbit = 4.
+    """
+    data = np.asarray(data)
+    if len(data) > 0:
+        lim = 1 << (nbit-1)
+        if not (-lim <= data.min() and data.max() <= lim-1):
+            raise ValueError(f"Values in [{data.min()},{data.max()}] are out of range of {nbit}-bit signed integer: [{-lim},{lim-1}]")
+    if nbit == 4:
+        return (data & 0xF).astype(np.uint8)
+    # 2's complement of 32 bit in big endian -----------
+    word = data.astype('>i4').view(np.uint8).reshape(-1, 4)
+    return word[:, 4 - nbit//8:].reshape(-1)
+
+def __pack_nibbles__(
+    nibble:np.ndarray,
+    ) -> np.ndarray:
+    """
+    Pack 4-bit values into bytes (upper 4 bits first).
+    0 is padded to the last byte if the number of values is odd.
+    """
+    if len(nibble) % 2 == 1:
+        nibble = np.append(nibble, np.uint8(0))
+    return (nibble[0::2] << 4) | nibble[1::2]
@@ -0,0 +1,163 @@
+"""
+Module for writing WIN data 1s segment by 1s segment.
+
+Unlike WIN.write, each 1s segment is encoded and written
+as soon as it is given, so long data can be converted in bounded memory.
+"""
+import datetime
+import numpy as np
+
+from ....utils.log import logger
+from .helper import __1ch2bin__, __add_header__
+
+class WINWriter:
+    """
+    Writer appending 1s segments to a WIN file.
+
+    Example
+    ----------
+    with wingram.WINWriter("out.win") as w:
+        w.write_second(datetime.datetime(2023,10,29,11,25,0), {"0200": data0, "0201": data1})
+        w.write(win_chunk)
+
+    Attributes
+    ----------
+    fp: str
+        File path of the WIN file.
+    sample_size: int
+        Sample size of the channel units. Chosen for each unit if None.
+    n_seconds: int
+        Number of 1s segments written.
+    """
+    def __init__(
+        self,
+        fp:str,
+        sample_size:int = None,
+        append:bool = False,
+        buffering:int = 1 << 20,
+        ):
+        """
+        Parameters
+        ----------
+        fp: str
+            File path of the WIN file.
+        sample_size: int, optional
+            Sample size of the channel units (0-5).
+            The smallest one satisfying each unit is used if None.
+        append: bool, optional, default False
+            If True, append to the existing file instead of overwriting.
+        buffering: int, optional, default 1 MB
+            Buffer size of the file [B].
+        """
+        self.fp = fp
+        self.sample_size = sample_size
+        self.n_seconds = 0
+        self.f = open(fp, "ab" if append else "wb", buffering=buffering)
+        return
+
+    def __repr__(self):
+        return f"WINWriter\t:{self.fp} ({self.n_seconds} s written)"
+
+    def close(self):
+        if not self.f.closed:
+            self.f.close()
+            logger.info(f"Saved: {self.fp}")
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    # =======================
+    # write
+    # =======================
+    def write_second(
+        self,
+        starttime:datetime.datetime,
+        data:dict,
+        fs:int|dict = None,
+        ):
+        """
+        Encode and write 1s segment.
+
+        Parameters
+        ----------
+        starttime: datetime.datetime
+            Start time of the 1s segment. Must be on a whole second.
+        data: dict[str, np.ndarray]
+            Integer samples of the second for each channel number
+            (hexadecimal str or int).
+        fs: int or dict[str, int], optional
+            Sampling frequency of all or each channel.
+            The number of samples is used if None.
+            It must be equal to the number of samples of the second.
+        """
+        if self.f.closed:
+            raise ValueError(f"Writer is already closed: {self.fp}")
+        if starttime.microsecond != 0:
+            raise ValueError(f"Start time must be on a whole second: {starttime}")
+
+        units = []
+        for ch, samples in data.items():
+            samples = np.asarray(samples)
+            if isinstance(fs, dict):
+                _fs = fs[ch]
+            elif fs is not None:
+                _fs = fs
+            else:
+                _fs = len(samples)
+            if len(samples) != _fs:
+                raise ValueError(f"Number of samples of {ch} ({len(samples)}) is different from fs ({_fs}).")
+            units.append(
+                __1ch2bin__(
+                    data = samples,
+                    fs = _fs,
+                    chnumber = int(ch, 16) if isinstance(ch, str) else int(ch),
+                    sample_size = self.sample_size,
+                    force_make_int = False,
+                )
+            )
+        self.f.write(__add_header__(b"".join(units), starttime))
+        self.n_seconds += 1
+        return self
+
+    def write(
+        self,
+        win,
+        boundary:str = "cut",
+        ):
+        """
+        Write WIN or WIN1ch data second by second.
+        The whole data is encoded at once before writing,
+        so only the writing is incremental.
+
+        Parameters
+        ----------
+        win: WIN or WIN1ch
+            Data to write. Calibrated data are decalibrated.
+        boundary: str, optional
+            Boundary condition for the data.
+            "cut" or "padding" or "zero-padding"
+        """
+        if self.f.closed:
+            raise ValueError(f"Writer is already closed: {self.fp}")
+        bitdf = win.__to_bit__(
+            sample_size = self.sample_size,
+            boundary = boundary,
+        )
+        # WIN1ch gives Series of 1s units -----------
+        if bitdf.ndim == 1:
+            bitdf = bitdf.to_frame()
+        for t in range(len(bitdf)):
+            self.f.write(
+                __add_header__(
+                    # channels without the second are NaN -----------
+                    b"".join(b for b in bitdf.iloc[t] if isinstance(b, bytes)),
+                    bitdf.index[t],
+                )
+            )
+            self.n_seconds += 1
+        return self
@@ -10,6 +10,8 @@ def int2bin(
     # ----------------------
     # check, prepare
     # ----------------------
+    # numpy integer (e.g. int32) overflows in 2's complement below
+    value = int(value)
     if signed:
         # check range -----------
         if not (-2**(nbit-1)<= value <= 2**(nbit-1)-1):